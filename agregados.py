@@ -0,0 +1,137 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from derivacoes import as_category
+from preparacao import DATA_PATH, encode_multilabels, get_prepared
+
+# Dimensões presentes em todos os cuboides; os gráficos somam sobre as que não usam
+BASE_DIMS = ["gender", "age", "mobileoperatingsystem", "dailyusages"]
+
+# Dimensões extras de cada cuboide, além das dimensões base
+CUBOIDS = {
+    "base": [],
+    "educacao": ["mobilephoneuseforeducation"],
+    "apps": ["educationalapps"],
+    "edu_desempenho": ["mobilephoneuseforeducation", "performanceimpact"],
+    "saude": ["simplified_health"],
+    "precaucoes": ["healthprecautions"],
+    "sintomas": ["simplified_symptoms"],
+}
+
+# Colunas numéricas somadas em cada cuboide (a contagem "n" está sempre presente)
+SUMS = ["symptom_count", "has_symptoms"]
+
+# Quantidade de recortes filtrados mantidos em memória por versão do cubo
+MAX_SLICES = 64
+
+
+# Agrega as linhas em cuboides de contagem. Cada cuboide tem uma linha por
+# combinação observada das suas dimensões, então o tamanho depende só da
+# cardinalidade das categorias e não do número de respondentes.
+def build_cube(df, indicators=None, version=None):
+    base = [d for d in BASE_DIMS if d in df.columns]
+    frame = df[base].apply(as_category)
+    frame["n"] = 1
+    if "symptom_count" in df.columns:
+        frame["symptom_count"] = df["symptom_count"]
+        frame["has_symptoms"] = (df["symptom_count"] > 0).astype(int)
+
+    cuboids = {}
+    for name, extra in CUBOIDS.items():
+        if not all(col in df.columns for col in extra):
+            continue
+        dims = base + extra
+        data = frame.join(df[extra].apply(as_category)) if extra else frame
+        cuboids[name] = _group(data, dims)
+
+    # Sintomas individuais: soma das colunas da matriz indicadora por combinação
+    # das dimensões base, em formato longo (uma linha por sintoma)
+    if indicators is None:
+        indicators = encode_multilabels(df)
+    if "usagesymptoms" in indicators:
+        symptoms = indicators["usagesymptoms"]
+        data = frame[base].join(symptoms.frame(index=frame.index))
+        summed = data.groupby(base, observed=True, dropna=False)[symptoms.vocabulary].sum()
+        long = summed.rename_axis(columns="symptom").stack().astype("int64").rename("n").reset_index()
+        long["symptom"] = long["symptom"].astype("category")
+        cuboids["sintoma_item"] = long[long["n"] > 0].reset_index(drop=True)
+
+    return Cube(cuboids, len(df), version)
+
+
+def _group(data, dims):
+    values = [col for col in ["n"] + SUMS if col in data.columns]
+    return data.groupby(dims, observed=True, dropna=False)[values].sum().reset_index()
+
+
+class Cube:
+    def __init__(self, cuboids, total, version=None):
+        self.cuboids = cuboids
+        self.total = total
+        self.version = version
+        self._slices = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Colunas presentes no cubo e recorte com dados (filtros podem esvaziá-lo)
+    def has(self, *columns):
+        if not self.total:
+            return False
+        return all(any(col in cuboid.columns for cuboid in self.cuboids.values()) for col in columns)
+
+    # Memória dos cuboides (recortes incluídos só no próprio recorte)
+    def nbytes(self):
+        return int(sum(cuboid.memory_usage(deep=True).sum() for cuboid in self.cuboids.values()))
+
+    # Categorias de uma dimensão base, na ordem do categórico
+    def categories(self, dim):
+        values = self.cuboids["base"][dim]
+        return [c for c in values.cat.categories if c in set(values.dropna())]
+
+    # Contagens de um cuboide somadas sobre as dimensões não pedidas. Por padrão
+    # descarta categorias ausentes das dimensões pedidas, como value_counts/crosstab.
+    def counts(self, name, dims, value="n", dropna=True):
+        cuboid = self.cuboids[name]
+        if isinstance(dims, str):
+            dims = [dims]
+        if dropna:
+            cuboid = cuboid.dropna(subset=dims)
+        return cuboid.groupby(dims, observed=True, dropna=False, sort=False)[value].sum()
+
+    # Recorte do cubo para um filtro ((dimensão, (valores, ...)), ...). O filtro só
+    # mascara as linhas dos cuboides, que são pequenos; os dados brutos não são
+    # relidos. Recortes são memoizados por filtro e compartilhados entre sessões.
+    def slice(self, filters=None):
+        if not filters:
+            return self
+        key = tuple(filters)
+        with self._lock:
+            sliced = self._slices.get(key)
+            if sliced is not None:
+                self._slices.move_to_end(key)
+                return sliced
+
+        cuboids = {}
+        for name, cuboid in self.cuboids.items():
+            mask = pd.Series(True, index=cuboid.index)
+            for dim, values in key:
+                if dim in cuboid.columns:
+                    mask &= cuboid[dim].isin(values)
+            cuboids[name] = cuboid[mask].reset_index(drop=True)
+        sliced = Cube(cuboids, int(cuboids["base"]["n"].sum()), self.version)
+
+        with self._lock:
+            self._slices[key] = sliced
+            if len(self._slices) > MAX_SLICES:
+                self._slices.popitem(last=False)
+        return sliced
+
+
+# Cubo de uma versão preparada, memoizado junto com ela
+def prepared_cube(prepared):
+    return prepared.artifact("cube", lambda p: build_cube(p.df, p.indicators, p.version))
+
+
+def get_cube(file_path=DATA_PATH):
+    return prepared_cube(get_prepared(file_path))
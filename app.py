@@ -7,21 +7,12 @@ from shinywidgets import render_plotly
 import pandas as pd
 import plotly.express as px
 
-@reactive.Calc
-def load_data():
-    df = pd.read_csv("saudevscelular.csv")
-    df.columns = [col.strip().replace(" ", "").replace("_", "").lower() for col in df.columns]
-
-    if "mobilephoneactivities" in df.columns and df["mobilephoneactivities"].dtype == "object":
-        df["mobilephoneactivities"] = df["mobilephoneactivities"].str.split(";")
-    
-    if "usagesymptoms" in df.columns and df["usagesymptoms"].dtype == "object":
-        df["usagesymptoms"] = df["usagesymptoms"].str.split(";")
-    
-    df["gender"] = df["gender"].fillna(df["gender"].mode()[0])
-    df["age"] = pd.Categorical(df["age"], categories=["16-20", "21-25", "26-30", "31-35"], ordered=True)
+from correlacao import get_correlation
+from preparacao import get_dataset
 
-    return df
+# Dataset preparado e compartilhado pelo processo (mesma limpeza do pipeline em lote)
+def load_data():
+    return get_dataset()
 
 app_ui = ui.page_fluid(
     ui.h2("📱 Impacto do Uso de Celulares na Educação e Saúde", class_="text-primary"),
@@ -89,13 +80,8 @@ def server(input, output, session):
     @render_plotly
     def grafico_sintomas():
         df = load_data()
-        def simplificar(val):
-            if isinstance(val, list):
-                if "All of these" in val: return "Todos"
-                elif len(val) > 1: return "Múltiplos"
-                else: return val[0]
-            return "Não especificado"
-        df["sintomas"] = df["usagesymptoms"].apply(simplificar)
+        rotulos = {"All of these": "Todos", "Multiple": "Múltiplos", "Not specified": "Não especificado"}
+        df = df.assign(sintomas=df["simplified_symptoms"].map(lambda v: rotulos.get(v, v)))
         fig = px.histogram(df, x="sintomas", color="gender", title="Sintomas Relatados pelo Uso do Celular")
         return fig
 
@@ -110,31 +96,14 @@ def server(input, output, session):
     @render_plotly
     def grafico_saude():
         df = load_data()
-        def simplificar(val):
-            if isinstance(val, list): return val[0]
-            elif isinstance(val, str) and ";" in val: return val.split(";")[0]
-            return val
-        df["avaliacao"] = df["healthrating"].apply(simplificar)
-        fig = px.histogram(df, x="avaliacao", color="gender", title="Autoavaliação da Saúde")
+        fig = px.histogram(df, x="simplified_health", color="gender", labels={"simplified_health": "avaliacao"}, title="Autoavaliação da Saúde")
         return fig
 
     @output
     @render_plotly
     def grafico_correlacao():
-        df = load_data()
-        maps = {
-            'mobilephoneuseforeducation': {'Frequently': 4, 'Sometimes': 3, 'Rarely': 2, 'Never': 1},
-            'dailyusages': {'<2hours': 1, '2-4hours': 2, '4-6hours': 3, '>6hours': 4},
-            'performanceimpact': {'Stronglyagree': 5, 'Agree': 4, 'Neutral': 3, 'Disagree': 2, 'Stronglydisagree': 1},
-            'symptomfrequency': {'Frequently': 4, 'Sometimes': 3, 'Rarely': 2, 'Never': 1},
-            'healthrating': {'Excellent': 4, 'Good': 3, 'Fair': 2, 'Poor': 1}
-        }
-        for col, mapping in maps.items():
-            if col in df.columns:
-                df[col + '_num'] = df[col].map(mapping)
-
-        numeric_cols = [col for col in df.columns if col.endswith('_num')]
-        corr = df[numeric_cols].corr()
+        # Estatísticas da correlação calculadas uma vez por versão do dataset
+        corr = get_correlation().matrix()
         fig = px.imshow(corr, text_auto=True, title="Matriz de Correlação entre Variáveis")
         return fig
 
@@ -172,7 +141,5 @@ Este projeto é um painel interativo criado com **Shiny para Python**, utilizand
 ```bash
 pip install -r requirements.txt
 shiny run --reload app.py
-
-
-
-
+```
+'''
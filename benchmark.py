@@ -0,0 +1,277 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from agregados import build_cube
+from cache_figuras import FIGURE_BUDGET
+from derivacoes import add_derived_features, encode_multilabels
+from gerador_dados import generate
+from graficos_lote import distribution_job, heatmap_job, render_plots
+from preparacao import DATA_PATH
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Tamanhos padrão; --linhas aceita até 1e7
+DEFAULT_ROWS = [1_000, 10_000, 100_000]
+
+# Módulos pesados que a importação de cada ponto de entrada não pode carregar:
+# os PNGs da CLI são desenhados nos processos de graficos_lote.py e os apps só
+# importam o plotly na primeira figura (graficos.py, cache_figuras.py). O
+# pyarrow em si vem com o pandas; o snapshot (pyarrow.feather) só é lido na
+# carga em segundo plano e os apps não leem Parquet
+IMPORTACOES = {
+    "saudevscelular": ["matplotlib", "seaborn", "plotly"],
+    "dashboard_executivo": ["matplotlib", "seaborn", "plotly.express", "plotly.graph_objects", "plotly.io",
+                            "pyarrow.feather", "pyarrow.parquet"],
+    "app_deploy": ["matplotlib", "seaborn", "plotly.express", "plotly.graph_objects", "plotly.io",
+                   "pyarrow.feather", "pyarrow.parquet"],
+}
+
+# Tempo máximo de importação de cada ponto de entrada, em segundos (o menor de
+# `repeat` interpretadores novos); acima dele o benchmark falha. Medidos entre
+# 0,5 e 0,8 s para a CLI e entre 1,3 e 1,9 s para os apps
+LIMITES_IMPORTACAO = {
+    "saudevscelular": 0.9,
+    "dashboard_executivo": 2.2,
+    "app_deploy": 2.2,
+}
+
+# Com --base, folga sobre o tempo do run anterior antes de contar como regressão
+TOLERANCIA_IMPORTACAO = 0.25
+
+SCRIPT_IMPORTACAO = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"segundos": seconds, "carregados": [m for m in {proibidos!r} if m in sys.modules]}}))
+"""
+
+
+# Implementação antiga, linha a linha, mantida só como referência de paridade
+def simplify_multiple(value):
+    if isinstance(value, list):
+        if 'All of these' in value:
+            return 'All of these'
+        elif len(value) > 1:
+            return 'Multiple'
+        elif len(value) == 1:
+            return value[0]
+    elif isinstance(value, str):
+        if 'All of these' in value:
+            return 'All of these'
+        elif ';' in value:
+            return 'Multiple'
+        return value
+    return 'Not specified'
+
+
+def simplify_rating(value):
+    if isinstance(value, list):
+        return value[0]
+    elif isinstance(value, str) and ';' in value:
+        return value.split(';')[0]
+    return value
+
+
+def derivacoes_linha_a_linha(df):
+    out = pd.DataFrame(index=df.index)
+    activities = df['mobilephoneactivities'].astype(object).str.split(';')
+    symptoms = df['usagesymptoms'].astype(object).str.split(';')
+    out['simplified_activities'] = activities.apply(simplify_multiple)
+    out['simplified_symptoms'] = symptoms.apply(simplify_multiple)
+    out['simplified_health'] = df['healthrating'].astype(object).apply(simplify_rating)
+    out['symptom_count'] = symptoms.apply(lambda x: len(x) if isinstance(x, list) else 1 if isinstance(x, str) else 0)
+    return out
+
+
+def derivacoes_vetorizadas(df):
+    return add_derived_features(df.copy())[['simplified_activities', 'simplified_symptoms',
+                                            'simplified_health', 'symptom_count']]
+
+
+# Mede uma chamada: menor tempo de parede entre as repetições, pico de memória
+# alocada (tracemalloc, numa execução separada para não distorcer o tempo) e o
+# tamanho do resultado serializado quando ele é uma figura ou texto
+def medir(func, *args, repeat=1):
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    measure = {"seconds": seconds, "peak_bytes": peak}
+    if hasattr(result, "to_plotly_json"):
+        measure["json_bytes"] = len(result.to_json())
+    elif isinstance(result, str):
+        measure["json_bytes"] = len(json.dumps(result))
+    return result, measure
+
+
+def benchmark_tamanho(rows, workdir, file_path=DATA_PATH, repeat=1):
+    # Os estágios da análise gravam em plots/ relativo ao diretório atual
+    import saudevscelular
+    from graficos import FIGURAS, FIGURAS_DEPLOY, METRICAS
+
+    csv_path = generate(os.path.join(workdir, f"sintetico_{rows}.csv"), rows, file_path)
+    results = []
+
+    def registrar(kind, name, func, *args):
+        result, measure = medir(func, *args, repeat=repeat)
+        results.append({"rows": rows, "kind": kind, "name": name, **measure})
+        return result
+
+    logging.disable(logging.INFO)
+    try:
+        df = registrar("etapa", "load_data", saudevscelular.load_data, csv_path)
+        df_clean = registrar("etapa", "clean_data", saudevscelular.clean_data, df)
+        indicators = registrar("etapa", "encode_multilabels", encode_multilabels, df_clean)
+        registrar("etapa", "derivacoes_linha_a_linha", derivacoes_linha_a_linha, df_clean)
+        registrar("etapa", "derivacoes_vetorizadas", derivacoes_vetorizadas, df_clean)
+        # Aceleração da derivação vetorizada sobre a linha a linha
+        results[-1]["speedup"] = results[-2]["seconds"] / results[-1]["seconds"]
+        df_analyzed = registrar("etapa", "exploratory_analysis", saudevscelular.exploratory_analysis, df_clean.copy())
+        corr = registrar("etapa", "correlation_analysis", saudevscelular.correlation_analysis, df_analyzed)
+        distributions = {col: df_analyzed[col].value_counts() for _, col in saudevscelular.DISTRIBUTIONS}
+        jobs = [distribution_job(title, col, distributions[col]) for title, col in saudevscelular.DISTRIBUTIONS]
+        registrar("etapa", "render_plots", render_plots, jobs + [heatmap_job("Matriz de Correlação", corr)], None, "plots", True)
+        cube = registrar("etapa", "build_cube", build_cube, df_analyzed, indicators)
+
+        for name, func in METRICAS.items():
+            registrar("metrica", name, func, cube)
+        for name, func in FIGURAS.items():
+            registrar("grafico", name, func, cube)
+        for name, func in FIGURAS_DEPLOY.items():
+            registrar("deploy", name, func, cube)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    # Paridade entre a derivação antiga e a vetorizada
+    antigo, novo = derivacoes_linha_a_linha(df_clean), derivacoes_vetorizadas(df_clean)
+    divergentes = [col for col in antigo.columns if not antigo[col].astype(str).equals(novo[col].astype(str))]
+    if divergentes:
+        logging.error(f"Derivações divergentes com {rows} linhas: {', '.join(divergentes)}")
+
+    # O JSON das figuras deve depender das categorias, não do número de linhas
+    acima = [f"{r['kind']}/{r['name']}" for r in results
+             if "json_bytes" in r and r["kind"] != "metrica" and r["json_bytes"] > FIGURE_BUDGET]
+    if acima:
+        logging.error(f"Figuras acima do orçamento de {FIGURE_BUDGET // 1024} KiB com {rows} linhas: {', '.join(acima)}")
+
+    os.remove(csv_path)
+    return results, not divergentes and not acima
+
+
+# Tempo de importação de cada ponto de entrada, num interpretador novo a cada
+# medida (nada em cache do próprio benchmark), a partir do diretório do projeto
+def medir_importacoes(repeat=3, base=None):
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    base = base or {}
+    results, ok = [], True
+    for module, proibidos in IMPORTACOES.items():
+        script = SCRIPT_IMPORTACAO.format(module=module, proibidos=proibidos)
+        runs = []
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, "-c", script], cwd=project_dir,
+                                 capture_output=True, text=True, check=True)
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        loaded = sorted({m for run in runs for m in run["carregados"]})
+        seconds = min(run["segundos"] for run in runs)
+        results.append({"module": module, "seconds": seconds, "loaded": loaded})
+        logging.info(f"Importação de {module:<22} {seconds * 1000:8.1f} ms")
+        if loaded:
+            logging.error(f"A importação de {module} carregou módulos pesados: {', '.join(loaded)}")
+            ok = False
+        if seconds > LIMITES_IMPORTACAO[module]:
+            logging.error(f"A importação de {module} levou {seconds:.2f} s (limite {LIMITES_IMPORTACAO[module]:.2f} s)")
+            ok = False
+        if module in base and seconds > base[module] * (1 + TOLERANCIA_IMPORTACAO):
+            logging.error(f"A importação de {module} ficou mais lenta que no run de base: "
+                          f"{seconds * 1000:.1f} ms contra {base[module] * 1000:.1f} ms")
+            ok = False
+    return results, ok
+
+
+# Tempos de importação de um benchmark_resultados.json anterior
+def carregar_base(path):
+    with open(path, encoding="utf-8") as f:
+        return {r["module"]: r["seconds"] for r in json.load(f).get("imports", [])}
+
+
+def resumo(results):
+    for r in results:
+        extra = f", {r['json_bytes'] / 1024:.1f} KiB" if "json_bytes" in r else ""
+        if "speedup" in r:
+            extra += f", {r['speedup']:.1f}x mais rápida que a linha a linha"
+        logging.info(f"{r['rows']:>10} linhas  {r['kind']:<8} {r['name']:<32} "
+                     f"{r['seconds'] * 1000:10.1f} ms  pico {r['peak_bytes'] / 2**20:8.1f} MiB{extra}")
+
+
+def metadados():
+    import plotly
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plotly": plotly.__version__,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks da preparação dos dados e dos gráficos do dashboard")
+    parser.add_argument("--linhas", type=int, nargs="+", default=DEFAULT_ROWS,
+                        help="tamanhos do dataset sintético (1e3 a 1e7)")
+    parser.add_argument("--repeticoes", type=int, default=1, help="execuções cronometradas por medida (vale a menor)")
+    parser.add_argument("--dados", default=DATA_PATH, help="CSV original usado como base da amostragem")
+    parser.add_argument("--saida", default="benchmark_resultados.json", help="arquivo JSON com os resultados")
+    parser.add_argument("--base", help="resultados de um run anterior: falha se alguma importação ficar "
+                                       f"mais de {TOLERANCIA_IMPORTACAO:.0%} mais lenta")
+    args = parser.parse_args(argv)
+    output_path = os.path.abspath(args.saida)
+    file_path = os.path.abspath(args.dados)
+
+    logging.info("Medindo o tempo de importação dos pontos de entrada...")
+    base = carregar_base(args.base) if args.base else None
+    imports, ok = medir_importacoes(max(args.repeticoes, 3), base)
+
+    all_results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            for rows in args.linhas:
+                logging.info(f"Executando benchmark com {rows} linhas...")
+                results, parity = benchmark_tamanho(rows, workdir, file_path, args.repeticoes)
+                resumo(results)
+                all_results.extend(results)
+                ok = ok and parity
+        finally:
+            os.chdir(cwd)
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"meta": metadados(), "imports": imports, "results": all_results}, f, indent=2)
+    logging.info(f"Resultados salvos em {output_path}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
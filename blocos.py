@@ -0,0 +1,266 @@
+import os
+import shutil
+import logging
+from collections import Counter
+
+import pandas as pd
+
+from correlacao import CorrelationStats
+from derivacoes import add_derived_features
+from imputacao import ModeImputer, category_order
+from preparacao import (
+    EXCEL_ENGINE,
+    TEXT_COLUMNS,
+    apply_schema,
+    clean_survey,
+    drop_excluded,
+    normalize_columns,
+    normalize_name,
+)
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+# Processamento em blocos do questionário: nenhuma etapa mantém o arquivo
+# inteiro em memória, só um bloco e os acumuladores (contagens por categoria e
+# estatísticas suficientes da correlação), cujo tamanho não depende das linhas.
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+# Blocos já com nomes normalizados e esquema aplicado; `columns` (nomes
+# normalizados) restringe a leitura às colunas necessárias
+def iter_chunks(file_path, chunksize=DEFAULT_CHUNKSIZE, columns=None):
+    if file_path.endswith('.csv'):
+        header = pd.read_csv(file_path, nrows=0).columns
+        usecols = [col for col in header if columns is None or normalize_name(col) in columns]
+        dtype = {col: "category" for col in usecols if normalize_name(col) not in TEXT_COLUMNS}
+        chunks = pd.read_csv(file_path, dtype=dtype, usecols=usecols, chunksize=chunksize)
+    elif file_path.endswith(('.xlsx', '.xls')):
+        # Excel não é lido em partes: o arquivo inteiro vira um único bloco
+        chunks = [pd.read_excel(file_path, engine=EXCEL_ENGINE)]
+    elif file_path.endswith('.parquet'):
+        if pq is None:
+            raise ValueError("pyarrow é necessário para ler Parquet em blocos")
+        parquet = pq.ParquetFile(file_path)
+        names = [col for col in parquet.schema_arrow.names if columns is None or normalize_name(col) in columns]
+        chunks = (batch.to_pandas() for batch in parquet.iter_batches(batch_size=chunksize, columns=names))
+    else:
+        raise ValueError("Formato de arquivo não suportado")
+
+    for chunk in chunks:
+        yield apply_schema(normalize_columns(chunk))
+
+
+# Contagens exatas por categoria, somadas bloco a bloco. Categorias sem
+# ocorrência no bloco entram com zero, como no value_counts de um categórico.
+class CategoryCounts:
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.counts = {col: Counter() for col in self.columns}
+
+    def update(self, df):
+        for col in self.columns:
+            if col in df.columns:
+                self.counts[col].update(df[col].value_counts(sort=False).to_dict())
+
+    def merge(self, other):
+        for col, counter in other.counts.items():
+            self.counts.setdefault(col, Counter()).update(counter)
+        return self
+
+    # Contagens em ordem decrescente, empates na ordem do categórico, como value_counts()
+    def series(self, col):
+        counts = self.counts[col]
+        labels = category_order(col, counts)
+        series = pd.Series([counts[label] for label in labels], index=labels, dtype="int64").rename_axis(col)
+        return series.sort_values(ascending=False, kind="stable")
+
+
+# Passada única: as frequências das colunas imputadas são acumuladas enquanto os
+# blocos chegam, e cada bloco é imputado na hora com as modas parciais e gravado
+# na ordem do arquivo. Os acumuladores de um bloco que teve valores imputados
+# ficam separados até o fim: se as modas finais (do arquivo inteiro, ou de
+# todos os arquivos quando vários processadores são mesclados) coincidem com as
+# usadas, eles são somados aos totais; se a moda de alguma coluna imputada no
+# bloco mudou, só esses blocos são relidos da entrada, refeitos com as modas
+# finais e substituídos no CSV. Assim contagens, correlação e saída usam
+# exatamente os mesmos valores que a limpeza em memória. Com `modes` conhecidas
+# de antemão nada fica pendente. O processador só guarda caminhos e
+# acumuladores, então pode ir e voltar de um processo worker.
+class ChunkProcessor:
+    def __init__(self, output_path, distribution_columns, scores, levels=None,
+                 source=None, chunksize=DEFAULT_CHUNKSIZE, modes=None):
+        self.output_path = output_path
+        self.distribution_columns = list(distribution_columns)
+        self.scores = scores
+        self.levels = levels
+        self.source = source
+        self.chunksize = chunksize
+        self.modes = modes
+        self.counts = CategoryCounts(distribution_columns)
+        self.imputer = ModeImputer()
+        self.correlation = None
+        self.rows = 0
+        self.blocks = 0
+        self.bytes = 0
+        self.pending = []
+
+    def feed(self, chunk):
+        ordinal = self.blocks
+        chunk = drop_excluded(chunk)
+        if self.modes is not None:
+            self._write(self._accumulate(chunk, self.modes, self.counts))
+            return
+
+        self.imputer.update(chunk)
+        gaps = [col for col in self.imputer.columns if col in chunk.columns and chunk[col].isna().any()]
+        if not gaps:
+            self._write(self._accumulate(chunk, None, self.counts))
+            return
+
+        # Bloco com valores imputados pelas modas parciais: acumuladores à parte
+        provisional = self.imputer.modes()
+        counts = CategoryCounts(self.distribution_columns)
+        start = self.bytes
+        correlation = self._write(self._accumulate(chunk, provisional, counts, own=True))
+        self.pending.append({
+            "bloco": ordinal,
+            "modas": {col: provisional[col] for col in gaps},
+            "inicio": start,
+            "fim": self.bytes,
+            "contagens": counts,
+            "correlacao": correlation,
+        })
+
+    # Limpa e deriva o bloco e soma contagens e correlação em `counts` e nos
+    # totais (ou, com `own`, numa CorrelationStats só do bloco)
+    def _accumulate(self, chunk, modes, counts, own=False):
+        if chunk.empty:
+            return chunk, None
+        chunk = add_derived_features(clean_survey(chunk, modes))
+        counts.update(chunk)
+        numeric = self.scores(chunk)
+        if own:
+            return chunk, CorrelationStats(numeric.columns, self.levels).update(numeric)
+        if self.correlation is None:
+            self.correlation = CorrelationStats(numeric.columns, self.levels)
+        self.correlation.update(numeric)
+        return chunk, None
+
+    def _csv(self, chunk, header):
+        return chunk.to_csv(index=False, header=header).encode("utf-8")
+
+    def _write(self, result):
+        chunk, correlation = result
+        self.blocks += 1
+        if chunk.empty:
+            return correlation
+        with open(self.output_path, "wb" if self.bytes == 0 else "ab") as f:
+            f.write(self._csv(chunk, header=self.bytes == 0))
+        self.bytes = os.path.getsize(self.output_path)
+        self.rows += len(chunk)
+        return correlation
+
+    def _add_correlation(self, correlation):
+        if correlation is None:
+            return
+        if self.correlation is None:
+            self.correlation = correlation
+        else:
+            self.correlation.merge(correlation)
+
+    # Fecha os blocos pendentes com as modas finais (por padrão, as do próprio
+    # processador) e devolve as colunas cuja moda mudou
+    def finish(self, modes=None):
+        if modes is None:
+            modes = self.imputer.modes()
+        stale = {}
+        changed = set()
+        for record in self.pending:
+            diff = [col for col, mode in record["modas"].items() if mode != modes.get(col)]
+            if diff:
+                stale[record["bloco"]] = record
+                changed.update(diff)
+            else:
+                self.counts.merge(record["contagens"])
+                self._add_correlation(record["correlacao"])
+        if stale:
+            self._redo(stale, modes)
+        self.pending = []
+        return self, sorted(changed)
+
+    # Relê da entrada só até o último bloco a refazer e troca os bytes desses
+    # blocos no CSV; o que vem antes do primeiro deles não é regravado
+    def _redo(self, stale, modes):
+        replacements = []
+        last = max(stale)
+        for ordinal, chunk in enumerate(iter_chunks(self.source, self.chunksize)):
+            record = stale.get(ordinal)
+            if record is not None:
+                chunk, _ = self._accumulate(drop_excluded(chunk), modes, self.counts)
+                header = record["inicio"] == 0
+                replacements.append((record["inicio"], record["fim"], self._csv(chunk, header)))
+            if ordinal >= last:
+                break
+        self.bytes = _replace_ranges(self.output_path, replacements)
+
+    # Junta os acumuladores de outro processador (os arquivos de saída continuam separados)
+    def merge(self, other):
+        self.counts.merge(other.counts)
+        self.imputer.merge(other.imputer)
+        self._add_correlation(other.correlation)
+        self.rows += other.rows
+        return self
+
+
+# Substitui trechos [início, fim) do arquivo, em ordem, copiando o restante em
+# partes de tamanho fixo; devolve o novo tamanho
+def _replace_ranges(path, replacements, buffer=1024 * 1024):
+    first = replacements[0][0]
+    tail = path + ".tail"
+    with open(path, "rb") as src, open(tail, "wb") as out:
+        src.seek(first)
+        position = first
+        for start, end, data in replacements:
+            remaining = start - position
+            while remaining > 0:
+                block = src.read(min(buffer, remaining))
+                out.write(block)
+                remaining -= len(block)
+            out.write(data)
+            src.seek(end)
+            position = end
+        shutil.copyfileobj(src, out, buffer)
+    with open(path, "r+b") as f, open(tail, "rb") as src:
+        f.truncate(first)
+        f.seek(first)
+        shutil.copyfileobj(src, f, buffer)
+        size = f.tell()
+    os.remove(tail)
+    return size
+
+
+def warn_approximate(imputer):
+    approximate = imputer.approximate_columns()
+    if approximate:
+        logging.warning(f"Moda aproximada (heavy hitters) em: {', '.join(approximate)}")
+
+
+def process_chunks(file_path, output_path, distribution_columns, scores,
+                   chunksize=DEFAULT_CHUNKSIZE, modes=None, levels=None):
+    processor = ChunkProcessor(output_path, distribution_columns, scores, levels, file_path, chunksize, modes)
+    for i, chunk in enumerate(iter_chunks(file_path, chunksize)):
+        processor.feed(chunk)
+        logging.info(f"Bloco {i + 1} processado ({processor.rows} linhas finalizadas)")
+
+    warn_approximate(processor.imputer)
+    blocks = len(processor.pending)
+    _, changed = processor.finish()
+    if changed:
+        logging.info(f"Moda final diferente da parcial em {', '.join(changed)}: blocos afetados refeitos "
+                     f"({blocks} blocos com valores imputados)")
+
+    return processor.rows, processor.counts, processor.correlation
@@ -0,0 +1,133 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from metricas import BYTES_BUCKETS, metrics
+from tarefas import run_shared
+
+# Limites padrão do cache de figuras por processo
+MAX_ENTRIES = 512
+MAX_BYTES = 64 * 1024 * 1024
+
+# Orçamento do JSON de uma figura. Figuras montadas sobre agregados crescem com
+# o número de categorias, não de respondentes; passar disso indica que linhas
+# brutas estão indo para o navegador.
+FIGURE_BUDGET = 64 * 1024
+
+
+# Cache LRU de figuras prontas (go.Figure), limitado por quantidade de entradas
+# e pelo tamanho do JSON de cada figura, medido uma vez na construção. A chave
+# identifica a figura de forma completa: (id da saída, versão do dataset,
+# estado dos filtros). A figura guardada é compartilhada entre sessões e só
+# lida: o shinywidgets copia data/layout para o FigureWidget de cada sessão.
+class FigureCache:
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, figure, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (figure, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    # Retorna a figura, construindo e guardando em caso de falta
+    def get_or_build(self, key, build):
+        figure = self.get(key)
+        if figure is None:
+            figure = self.build(key, build)
+        return figure
+
+    # A serialização só acontece aqui, para medir o tamanho e conferir o orçamento
+    def build(self, key, build):
+        with metrics.timer("figure_build_seconds", output=key[0]):
+            figure = build()
+            payload = figure.to_json()
+        metrics.observe("figure_bytes", len(payload), buckets=BYTES_BUCKETS, output=key[0])
+        check_budget(key[0], payload)
+        self.put(key, figure, len(payload))
+        return figure
+
+    # Descarta as figuras de versões anteriores do dataset (após uma recarga)
+    def retain_version(self, version):
+        with self._lock:
+            for key in [key for key in self._entries if key[1] != version]:
+                self.bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def check_budget(name, payload, budget=FIGURE_BUDGET):
+    if len(payload) > budget:
+        logging.warning(f"Figura {name} com {len(payload) / 1024:.1f} KiB de JSON, acima do orçamento "
+                        f"de {budget / 1024:.0f} KiB")
+        return False
+    return True
+
+
+figure_cache = FigureCache()
+
+
+@metrics.collector
+def _cache_metrics(registry):
+    stats = figure_cache.stats()
+    registry.set("figure_cache_entries", stats["entries"])
+    registry.set("figure_cache_bytes", stats["bytes"])
+    registry.set("figure_cache_hits_total", stats["hits"])
+    registry.set("figure_cache_misses_total", stats["misses"])
+    registry.set("figure_cache_evictions_total", stats["evictions"])
+    registry.set("figure_cache_hit_ratio", stats["hit_rate"])
+
+
+def cached_figure(output_id, version, filters, build, cache=figure_cache):
+    return cache.get_or_build((output_id, version, filters), build)
+
+
+# Versão para renderizadores async: em caso de falta, a construção roda no pool
+# de tarefas.py, uma vez só para sessões que peçam a mesma figura ao mesmo tempo;
+# um acerto é só a consulta ao dicionário, sem sair do event loop
+async def cached_figure_async(output_id, version, filters, build, cache=figure_cache):
+    key = (output_id, version, filters)
+    figure = cache.get(key)
+    if figure is None:
+        figure = await run_shared(("figura",) + key, cache.build, key, build)
+    return figure
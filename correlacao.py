@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+from preparacao import DATA_PATH, get_prepared
+
+# Escalas ordinais convertidas em números para a correlação
+CORRELATION_MAPS = {
+    'mobilephoneuseforeducation': {'Frequently': 4, 'Sometimes': 3, 'Rarely': 2, 'Never': 1},
+    'dailyusages': {'<2hours': 1, '2-4hours': 2, '4-6hours': 3, '>6hours': 4},
+    'performanceimpact': {'Stronglyagree': 5, 'Agree': 4, 'Neutral': 3, 'Disagree': 2, 'Stronglydisagree': 1},
+    'symptomfrequency': {'Frequently': 4, 'Sometimes': 3, 'Rarely': 2, 'Never': 1},
+    'simplified_health': {'Excellent': 4, 'Good': 3, 'Fair': 2, 'Poor': 1}
+}
+
+# Níveis de cada escala numérica, usados pelas tabelas de contingência
+SCORE_LEVELS = {col + '_num': sorted(set(mapping.values())) for col, mapping in CORRELATION_MAPS.items()}
+
+METHODS = ["pearson", "spearman", "kendall"]
+
+
+def ordinal_scores(df):
+    return pd.DataFrame({
+        col + '_num': df[col].map(mapping).astype(float)
+        for col, mapping in CORRELATION_MAPS.items() if col in df.columns
+    })
+
+
+# Estatísticas suficientes da correlação par a par (só linhas em que as duas
+# colunas existem, como DataFrame.corr), atualizadas lote a lote e mescláveis
+# entre workers:
+# - Pearson: n, médias e co-momentos centrados por par, combinados com as
+#   fórmulas de Chan/Welford, estáveis mesmo com milhões de linhas;
+# - Spearman e Kendall (tau-b): uma tabela de contingência por par sobre os
+#   níveis das escalas ordinais; postos médios e pares concordantes/discordantes
+#   saem das tabelas, então o resultado é exato e o custo não depende de n.
+class CorrelationStats:
+    def __init__(self, columns, levels=None):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.n = np.zeros((k, k))
+        self.mean_x = np.zeros((k, k))
+        self.m2_x = np.zeros((k, k))
+        self.c_xy = np.zeros((k, k))
+        self.levels = None
+        self.tables = {}
+        if levels is not None:
+            self.levels = [np.asarray(levels[col], dtype=float) for col in self.columns]
+            self.tables = {
+                (i, j): np.zeros((len(self.levels[i]), len(self.levels[j])), dtype=np.int64)
+                for i in range(k) for j in range(i + 1, k)
+            }
+
+    @classmethod
+    def from_frame(cls, frame, levels=None):
+        return cls(frame.columns, levels).update(frame)
+
+    def update(self, frame):
+        values = frame.reindex(columns=self.columns).to_numpy(dtype=float)
+        if not len(values):
+            return self
+        valid = ~np.isnan(values)
+        m = valid.astype(float)
+
+        # Momentos do lote, com os valores deslocados pela média de cada coluna
+        # no lote para que as somas de quadrados não percam precisão; colunas
+        # sem nenhuma resposta no lote ficam com deslocamento zero
+        counts = m.sum(axis=0)
+        totals = np.where(valid, values, 0.0).sum(axis=0)
+        shift = np.divide(totals, counts, out=np.zeros(len(self.columns)), where=counts > 0)
+        x = np.where(valid, values - shift, 0.0)
+        n = m.T @ m
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, (x.T @ m) / n, 0.0)
+        m2 = (x * x).T @ m - n * mean * mean
+        c = x.T @ x - n * mean * mean.T
+        self._combine(n, mean + shift[:, None], m2, c)
+
+        if self.tables:
+            for (i, j), table in self.tables.items():
+                both = valid[:, i] & valid[:, j]
+                ci = np.searchsorted(self.levels[i], values[both, i])
+                cj = np.searchsorted(self.levels[j], values[both, j])
+                known = (ci < len(self.levels[i])) & (cj < len(self.levels[j]))
+                known[known] &= (self.levels[i][ci[known]] == values[both, i][known]) & \
+                                (self.levels[j][cj[known]] == values[both, j][known])
+                flat = ci[known] * table.shape[1] + cj[known]
+                table += np.bincount(flat, minlength=table.size).reshape(table.shape)
+        return self
+
+    # Combinação de Chan et al. de dois conjuntos de momentos par a par
+    def _combine(self, n_b, mean_b, m2_b, c_b):
+        n_a, mean_a = self.n, self.mean_x
+        n = n_a + n_b
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = np.where(n > 0, n_a * n_b / n, 0.0)
+            ratio = np.where(n > 0, n_b / n, 0.0)
+        delta = mean_b - mean_a
+        self.c_xy = self.c_xy + c_b + delta * delta.T * weight
+        self.m2_x = self.m2_x + m2_b + delta * delta * weight
+        self.mean_x = mean_a + delta * ratio
+        self.n = n
+
+    def merge(self, other):
+        self._combine(other.n, other.mean_x, other.m2_x, other.c_xy)
+        for key, table in other.tables.items():
+            self.tables[key] += table
+        return self
+
+    def pearson(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = self.c_xy / np.sqrt(self.m2_x * self.m2_x.T)
+        return self._frame(np.clip(corr, -1.0, 1.0))
+
+    def spearman(self):
+        return self._from_tables(_spearman)
+
+    def kendall(self):
+        return self._from_tables(_kendall_tau_b)
+
+    def matrix(self, method="pearson"):
+        if method not in METHODS:
+            raise ValueError(f"Método de correlação desconhecido: {method}")
+        return getattr(self, method)()
+
+    def _from_tables(self, func):
+        if self.levels is None:
+            raise ValueError("Spearman e Kendall exigem os níveis das escalas ordinais")
+        k = len(self.columns)
+        corr = np.full((k, k), np.nan)
+        for (i, j), table in self.tables.items():
+            corr[i, j] = corr[j, i] = func(table)
+        return self._frame(corr)
+
+    def _frame(self, corr):
+        corr = corr.copy()
+        np.fill_diagonal(corr, np.where(np.diag(self.m2_x) > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+# Postos médios (empates recebem a média das posições) de cada nível
+def _midranks(marginal):
+    before = np.cumsum(marginal) - marginal
+    return before + (marginal + 1) / 2
+
+
+def _spearman(table):
+    n = table.sum()
+    if n < 2:
+        return np.nan
+    rows, cols = table.sum(axis=1), table.sum(axis=0)
+    rank_x = _midranks(rows) - (n + 1) / 2
+    rank_y = _midranks(cols) - (n + 1) / 2
+    cov = rank_x @ table @ rank_y
+    var = (rows @ rank_x ** 2) * (cols @ rank_y ** 2)
+    return cov / np.sqrt(var) if var > 0 else np.nan
+
+
+def _kendall_tau_b(table):
+    t = table.astype(float)
+    n = t.sum()
+    if n < 2:
+        return np.nan
+    # below_right[a, b] = pares com nível maior nas duas escalas;
+    # below_left[a, b] = nível maior na primeira e menor na segunda
+    suffix = t[::-1, ::-1].cumsum(axis=0).cumsum(axis=1)[::-1, ::-1]
+    below_right = np.zeros_like(t)
+    below_right[:-1, :-1] = suffix[1:, 1:]
+    prefix = t[::-1, :].cumsum(axis=0)[::-1, :].cumsum(axis=1)
+    below_left = np.zeros_like(t)
+    below_left[:-1, 1:] = prefix[1:, :-1]
+    concordant = (t * below_right).sum()
+    discordant = (t * below_left).sum()
+
+    pairs = n * (n - 1) / 2
+    ties_x = (t.sum(axis=1) * (t.sum(axis=1) - 1) / 2).sum()
+    ties_y = (t.sum(axis=0) * (t.sum(axis=0) - 1) / 2).sum()
+    denom = np.sqrt((pairs - ties_x) * (pairs - ties_y))
+    return (concordant - discordant) / denom if denom > 0 else np.nan
+
+
+# Matriz de correlação do dataset preparado, calculada uma vez por versão do
+# arquivo e compartilhada pelas sessões
+def get_correlation(file_path=DATA_PATH):
+    return get_prepared(file_path).artifact(
+        "correlacao", lambda prepared: CorrelationStats.from_frame(ordinal_scores(prepared.df), SCORE_LEVELS)
+    )
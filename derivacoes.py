@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+# Derivações das colunas categóricas. Todas trabalham sobre as categorias (poucas
+# dezenas) e só depois distribuem o resultado para as linhas pelos códigos do
+# categórico, então o custo por linha é uma indexação numpy, sem chamadas Python.
+
+# Campos com várias respostas separadas por ";"
+MULTI_LABEL_COLUMNS = ["mobilephoneactivities", "usagesymptoms", "healthrating"]
+
+MAPPING_EDU = {'Frequently': 4, 'Sometimes': 3, 'Rarely': 2, 'Never': 1}
+MAPPING_PERF = {'Stronglyagree': 5, 'Agree': 4, 'Neutral': 3, 'Disagree': 2, 'Stronglydisagree': 1}
+
+
+def as_category(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    return series.astype("category")
+
+
+# Aplica uma função a cada categoria e devolve o resultado por linha como novo
+# categórico; linhas ausentes (código -1) continuam ausentes
+def map_categories(series, func):
+    series = as_category(series)
+    values = [func(cat) for cat in series.cat.categories]
+    categories = list(dict.fromkeys(v for v in values if not pd.isna(v)))
+    position = {v: i for i, v in enumerate(categories)}
+    lookup = np.array([position.get(v, -1) for v in values] + [-1], dtype=np.int64)
+    codes = lookup[series.cat.codes.to_numpy()]
+
+    result = pd.Categorical.from_codes(codes, categories=categories)
+    return pd.Series(result, index=series.index, name=series.name)
+
+
+# Campo multivalorado codificado como matriz indicadora uint8 (linhas x vocabulário)
+class MultiLabel:
+    def __init__(self, vocabulary, matrix):
+        self.vocabulary = vocabulary
+        self.matrix = matrix
+
+    # Quantidade de respostas marcadas em cada linha
+    def row_counts(self):
+        return self.matrix.sum(axis=1, dtype=np.int64)
+
+    # Quantas linhas marcaram cada resposta
+    def counts(self):
+        return pd.Series(self.matrix.sum(axis=0, dtype=np.int64), index=self.vocabulary)
+
+    def column(self, label):
+        return self.matrix[:, self.vocabulary.index(label)]
+
+    def frame(self, index=None):
+        return pd.DataFrame(self.matrix, columns=self.vocabulary, index=index)
+
+
+# A divisão por ";" é feita uma vez por categoria; as linhas só indexam a tabela
+# de indicadores pelos códigos do categórico (código -1 = ausente = linha de zeros)
+def encode_multilabel(series):
+    series = as_category(series)
+    split = [[token.strip() for token in str(cat).split(";")] for cat in series.cat.categories]
+    vocabulary = list(dict.fromkeys(token for tokens in split for token in tokens))
+    position = {label: i for i, label in enumerate(vocabulary)}
+
+    table = np.zeros((len(split) + 1, len(vocabulary)), dtype=np.uint8)
+    for row, tokens in enumerate(split):
+        table[row, [position[token] for token in tokens]] = 1
+
+    return MultiLabel(vocabulary, table[series.cat.codes.to_numpy()])
+
+
+def encode_multilabels(df):
+    return {col: encode_multilabel(df[col]) for col in MULTI_LABEL_COLUMNS if col in df.columns}
+
+
+# Classificação "All of these" / "Multiple" / resposta única / "Not specified"
+# a partir da matriz indicadora, sem percorrer as linhas em Python
+def simplify_multilabel(multilabel):
+    vocabulary = multilabel.vocabulary
+    categories = list(dict.fromkeys(vocabulary + ['Not specified', 'Multiple', 'All of these']))
+    counts = multilabel.row_counts()
+    codes = np.where(counts == 1, multilabel.matrix.argmax(axis=1), categories.index('Not specified'))
+    codes[counts > 1] = categories.index('Multiple')
+    if 'All of these' in vocabulary:
+        codes[multilabel.column('All of these') == 1] = categories.index('All of these')
+    # Só as categorias que ocorrem, sem ordenar as linhas (bincount em vez de unique)
+    used = np.flatnonzero(np.bincount(codes, minlength=len(categories)))
+    remap = np.full(len(categories), -1, dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    result = pd.Categorical.from_codes(remap[codes], categories=[categories[i] for i in used])
+    return pd.Series(result)
+
+
+# Primeira resposta de um campo multivalorado ("Good;Excellent" -> "Good")
+def simplify_rating(series):
+    return map_categories(series, lambda cat: str(cat).split(';')[0].strip())
+
+
+# Colunas derivadas usadas pelos gráficos e pela análise, calculadas uma única
+# vez na preparação para que ninguém precise escrever no frame compartilhado
+def add_derived_features(df, indicators=None):
+    if indicators is None:
+        indicators = encode_multilabels(df)
+    if 'mobilephoneuseforeducation' in df.columns:
+        df['edu_num'] = df['mobilephoneuseforeducation'].map(MAPPING_EDU).astype(float)
+    if 'performanceimpact' in df.columns:
+        df['perf_num'] = df['performanceimpact'].map(MAPPING_PERF).astype(float)
+    if 'healthrating' in df.columns:
+        df['simplified_health'] = simplify_rating(df['healthrating'])
+    if 'mobilephoneactivities' in indicators:
+        df['simplified_activities'] = simplify_multilabel(indicators['mobilephoneactivities']).set_axis(df.index)
+    if 'usagesymptoms' in indicators:
+        symptoms = indicators['usagesymptoms']
+        df['simplified_symptoms'] = simplify_multilabel(symptoms).set_axis(df.index)
+        df['symptom_count'] = symptoms.row_counts()
+    return df
@@ -0,0 +1,230 @@
+import os
+import json
+import argparse
+import logging
+from html import escape
+
+import plotly.io as pio
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+from agregados import get_cube
+from graficos import FIGURAS, METRICAS
+from preparacao import DATA_PATH
+
+# Exportação estática do dashboard executivo para o GitHub Pages: as métricas e
+# figuras são calculadas uma vez a partir do cubo de agregados (nenhuma linha
+# do questionário vai para o navegador) e o resultado é servido como arquivos
+# estáticos, sem servidor Shiny por visitante.
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+OUTPUT_DIR = os.path.join('docs', 'dashboard')
+DATA_FILE = 'dashboard.json'
+PLOTLY_FILE = 'plotly.min.js'
+
+# Casas decimais mantidas nos números das figuras (percentuais, posições)
+DECIMALS = 4
+
+# Mesmo conteúdo do resumo e das abas do dashboard_executivo.py
+RESUMO = [
+    ("metrica_tempo_medio", "Tempo médio de uso diário"),
+    ("metrica_uso_educacional", "Uso para fins educacionais"),
+    ("metrica_sintomas", "Relatam sintomas"),
+    ("metrica_impacto_saude", "Consideram impacto na saúde"),
+]
+
+# Abas: (id, título, [(figura, título do card, largura no grid)])
+ABAS = [
+    ("demografia", "📊 Análise Demográfica", [
+        ("grafico_demografia", "Distribuição por Gênero e Faixa Etária", 6),
+        ("grafico_uso_diario", "Tempo de Uso Diário por Perfil", 6),
+    ]),
+    ("educacao", "🎓 Uso Educacional", [
+        ("grafico_freq_edu", "Frequência de Uso para Educação", 6),
+        ("grafico_apps_edu", "Tipos de Aplicativos Educacionais", 6),
+        ("grafico_correlacao_edu", "Correlação: Uso Educacional x Desempenho", 12),
+    ]),
+    ("saude", "⚠️ Saúde e Sintomas", [
+        ("grafico_sintomas", "Sintomas Relatados pelo Uso", 6),
+        ("grafico_saude", "Autoavaliação da Saúde", 6),
+        ("grafico_precaucao", "Precauções de Saúde Adotadas", 12),
+    ]),
+    ("correlacoes", "📈 Análise de Correlações", [
+        ("grafico_uso_vs_saude", "Tempo de Uso vs. Saúde", 6),
+        ("grafico_sintomas_vs_precaucoes", "Sintomas vs. Precauções", 6),
+    ]),
+]
+
+
+def _round_floats(value, decimals=DECIMALS):
+    if isinstance(value, float):
+        return round(value, decimals)
+    if isinstance(value, dict):
+        return {k: _round_floats(v, decimals) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_round_floats(v, decimals) for v in value]
+    return value
+
+
+# Figura como JSON enxuto. O template do Plotly (a maior parte do JSON de uma
+# figura pequena) é igual em todas, então sai de cada figura e vai uma vez só
+# para `tema`.
+def figure_payload(fig):
+    payload = json.loads(pio.to_json(fig, pretty=False))
+    template = payload.get('layout', {}).pop('template', None)
+    return _round_floats(payload), template
+
+
+def build_payload(cube):
+    figures, theme = {}, None
+    for name, build in FIGURAS.items():
+        figure, template = figure_payload(build(cube))
+        if template is not None:
+            if theme is None:
+                theme = template
+            elif template != theme:
+                figure['layout']['template'] = template
+        figures[name] = figure
+    return {'tema': theme, 'figuras': figures}
+
+
+PAGE = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Saúde Celular - Dashboard Executivo</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
+    <style>
+        body {{ font-family: 'Roboto', sans-serif; }}
+        .card {{ margin-bottom: 20px; border-radius: 10px; box-shadow: 0 4px 6px rgba(0,0,0,0.1); }}
+        .card-header {{ background-color: #6e8efb; color: white; font-weight: 500; border-radius: 10px 10px 0 0; }}
+        .section-title {{ color: #4A4A4A; border-bottom: 2px solid #6e8efb; padding-bottom: 8px; margin-bottom: 20px; }}
+        .metric-card {{ padding: 15px; text-align: center; background: linear-gradient(135deg, #f5f7ff 0%, #e9efff 100%);
+                        border-radius: 8px; margin-bottom: 20px; }}
+        .metric-value {{ font-size: 24px; font-weight: bold; color: #6e8efb; }}
+        .metric-label {{ font-size: 14px; color: #4A4A4A; }}
+        .text-primary {{ color: #6e8efb !important; }}
+        .text-secondary {{ color: #a777e3 !important; }}
+        .nav-tabs .nav-link.active {{ color: #6e8efb; border-bottom: 3px solid #6e8efb; }}
+        .figura {{ min-height: 450px; }}
+    </style>
+</head>
+<body>
+<div class="container-fluid">
+    <div style="padding: 20px 0; margin-bottom: 20px; border-bottom: 1px solid #eaeaea;">
+        <h1 class="text-primary">📱 Saúde Celular</h1>
+        <p class="lead text-secondary">Dashboard executivo sobre o impacto do uso de celulares na saúde e educação</p>
+    </div>
+
+    <h2 class="section-title">Resumo Executivo</h2>
+    <div class="row">
+{resumo}
+    </div>
+
+    <ul class="nav nav-tabs" role="tablist">
+{abas}
+    </ul>
+    <div class="tab-content pt-3">
+{paineis}
+    </div>
+
+    <div class="mt-5 mb-3 text-muted">
+        <hr>
+        <p>Versão estática gerada a partir de {linhas} respostas. Dados obtidos do
+           <a href="https://www.kaggle.com/datasets/innocentmfa/students-health-and-academic-performance/data" target="_blank">Kaggle</a>.</p>
+        <p><a href="https://github.com/Rebelo81/saudecelular" target="_blank">Código fonte no GitHub</a></p>
+    </div>
+</div>
+<script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
+<script src="{plotly}"></script>
+<script>
+    // Cada aba só desenha suas figuras quando é aberta pela primeira vez
+    const dados = fetch('{dados}').then(r => r.json());
+    function desenhar(painel) {{
+        dados.then(({{tema, figuras}}) => {{
+            painel.querySelectorAll('[data-figura]').forEach(el => {{
+                if (el.dataset.desenhada) return;
+                const fig = figuras[el.dataset.figura];
+                const layout = Object.assign({{template: tema}}, fig.layout);
+                Plotly.newPlot(el, fig.data, layout, {{responsive: true, displaylogo: false}});
+                el.dataset.desenhada = '1';
+            }});
+        }});
+    }}
+    document.querySelectorAll('[data-bs-toggle="tab"]').forEach(botao => {{
+        botao.addEventListener('shown.bs.tab', () => desenhar(document.querySelector(botao.dataset.bsTarget)));
+    }});
+    desenhar(document.querySelector('.tab-pane.active'));
+</script>
+</body>
+</html>
+"""
+
+
+def render_page(cube, plotly_src):
+    resumo = "\n".join(
+        f'        <div class="col-md-3"><div class="metric-card">'
+        f'<div class="metric-value">{escape(METRICAS[name](cube))}</div>'
+        f'<div class="metric-label">{escape(label)}</div></div></div>'
+        for name, label in RESUMO
+    )
+    abas, paineis = [], []
+    for i, (value, title, figures) in enumerate(ABAS):
+        active = " active" if i == 0 else ""
+        abas.append(
+            f'        <li class="nav-item" role="presentation"><button class="nav-link{active}" '
+            f'data-bs-toggle="tab" data-bs-target="#aba-{value}" type="button" role="tab">{escape(title)}</button></li>'
+        )
+        cards = "\n".join(
+            f'            <div class="col-lg-{width}"><div class="card"><div class="card-header">{escape(header)}</div>'
+            f'<div class="figura" data-figura="{name}"></div></div></div>'
+            for name, header, width in figures
+        )
+        paineis.append(
+            f'        <div class="tab-pane fade{" show" + active if active else ""}" id="aba-{value}" role="tabpanel">\n'
+            f'            <div class="row">\n{cards}\n            </div>\n        </div>'
+        )
+    return PAGE.format(
+        resumo=resumo, abas="\n".join(abas), paineis="\n".join(paineis),
+        linhas=cube.total, plotly=plotly_src, dados=DATA_FILE,
+    )
+
+
+def _write(path, content):
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(path + '.tmp', path)
+
+
+def export(output_dir=OUTPUT_DIR, file_path=DATA_PATH, cdn=False):
+    cube = get_cube(file_path)
+    os.makedirs(output_dir, exist_ok=True)
+
+    payload = json.dumps(build_payload(cube), ensure_ascii=False, separators=(',', ':'))
+    _write(os.path.join(output_dir, DATA_FILE), payload)
+
+    # Uma única cópia do plotly.js para todas as figuras (ou o CDN da mesma versão)
+    if cdn:
+        plotly_src = f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+    else:
+        plotly_src = PLOTLY_FILE
+        _write(os.path.join(output_dir, PLOTLY_FILE), get_plotlyjs())
+
+    _write(os.path.join(output_dir, 'index.html'), render_page(cube, plotly_src))
+    logging.info(f"Dashboard estático exportado em {output_dir}: {len(FIGURAS)} figuras, "
+                 f"{len(payload.encode('utf-8')) / 1024:.1f} KiB de dados")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta o dashboard executivo como site estático")
+    parser.add_argument("--saida", default=OUTPUT_DIR, help="diretório do site (padrão: docs/dashboard)")
+    parser.add_argument("--dados", default=DATA_PATH, help="CSV, Excel ou Parquet do questionário")
+    parser.add_argument("--cdn", action="store_true", help="carrega o plotly.js do CDN em vez de copiá-lo")
+    args = parser.parse_args(argv)
+    export(args.saida, args.dados, args.cdn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from preparacao import DATA_PATH, TEXT_COLUMNS, normalize_name
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_CHUNK = 500_000
+# Fração das células (fora as de texto livre) redesenhadas da distribuição marginal
+DEFAULT_NOISE = 0.05
+
+
+# Modelo do questionário estimado do arquivo real. As linhas reais são a amostra
+# da distribuição conjunta (combinações de respostas, campos com ";" e padrões de
+# ausência juntos); as marginais de cada coluna, com a taxa de ausentes incluída,
+# alimentam a perturbação. Trocar uma célula por um sorteio da própria marginal
+# preserva a marginal e a taxa de ausentes e só dilui a dependência entre colunas.
+class SurveyModel:
+    def __init__(self, source):
+        self.columns = list(source.columns)
+        self.rows = source.to_numpy(dtype=object)
+        self.marginals = {}
+        for i, col in enumerate(self.columns):
+            if normalize_name(col) in TEXT_COLUMNS:
+                continue
+            counts = source[col].value_counts(dropna=False)
+            self.marginals[i] = (counts.index.to_numpy(dtype=object), (counts / counts.sum()).to_numpy())
+
+    @classmethod
+    def from_file(cls, file_path=DATA_PATH):
+        return cls(pd.read_csv(file_path, dtype=str, keep_default_na=False, na_values=[""]))
+
+    def sample(self, size, rng, noise=DEFAULT_NOISE):
+        chunk = self.rows[rng.integers(0, len(self.rows), size)]
+        if noise > 0:
+            for i, (values, probs) in self.marginals.items():
+                redraw = np.flatnonzero(rng.random(size) < noise)
+                chunk[redraw, i] = values[rng.choice(len(values), size=len(redraw), p=probs)]
+        return pd.DataFrame(chunk, columns=self.columns)
+
+
+# Gera `rows` linhas em blocos de `chunk`, gravando cada bloco assim que é
+# sorteado (CSV em modo append ou row groups do Parquet); só um bloco fica em
+# memória. A mesma semente produz sempre o mesmo arquivo.
+def generate(output_path, rows, file_path=DATA_PATH, seed=0, chunk=DEFAULT_CHUNK, noise=DEFAULT_NOISE):
+    if output_path.endswith('.parquet'):
+        if pa is None:
+            raise ValueError("pyarrow é necessário para gerar Parquet")
+    elif not output_path.endswith('.csv'):
+        raise ValueError("Formato de arquivo não suportado")
+
+    model = SurveyModel.from_file(file_path)
+    rng = np.random.default_rng(seed)
+    writer = None
+    written = 0
+    start = time.perf_counter()
+    try:
+        while written < rows:
+            block = model.sample(min(chunk, rows - written), rng, noise)
+            if output_path.endswith('.parquet'):
+                table = pa.Table.from_pandas(block, preserve_index=False,
+                                             schema=pa.schema([(col, pa.string()) for col in model.columns]))
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+            else:
+                block.to_csv(output_path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+            written += len(block)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    elapsed = time.perf_counter() - start
+    logging.info(f"{written} linhas sintéticas geradas em {output_path} "
+                 f"({elapsed:.1f} s, {written / max(elapsed, 1e-9):,.0f} linhas/s)")
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos com o esquema do questionário")
+    parser.add_argument("--linhas", type=int, required=True, help="quantidade de linhas a gerar")
+    parser.add_argument("--saida", default="dados_sinteticos.csv", help="arquivo de saída (.csv ou .parquet)")
+    parser.add_argument("--dados", default=DATA_PATH, help="CSV real usado como modelo")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--bloco", type=int, default=DEFAULT_CHUNK, help="linhas por bloco gravado")
+    parser.add_argument("--ruido", type=float, default=DEFAULT_NOISE,
+                        help="fração de células sorteadas da marginal da coluna (0 = só reamostragem)")
+    args = parser.parse_args(argv)
+    generate(args.saida, args.linhas, args.dados, args.semente, args.bloco, args.ruido)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+import importlib
+
+from preparacao import AGE_CATEGORIES, DAILY_USAGE_CATEGORIES
+
+
+# Módulo importado só no primeiro acesso a um atributo. O plotly.express, o
+# plotly.graph_objects e o plotly.subplots não entram no tempo de importação
+# dos apps: as métricas do resumo não usam plotly, e as figuras são construídas
+# no pool de tarefas.py, fora do event loop
+class _LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+px = _LazyModule("plotly.express")
+go = _LazyModule("plotly.graph_objects")
+
+
+def make_subplots(*args, **kwargs):
+    from plotly.subplots import make_subplots
+    return make_subplots(*args, **kwargs)
+
+# Saídas do dashboard executivo. Cada função recebe um cubo de agregados
+# (completo ou recortado pelos filtros) e não depende de sessão do Shiny.
+
+# Métricas para o resumo executivo
+def metrica_tempo_medio(cube):
+    # Aqui seria ideal ter uma coluna numérica, mas vamos fazer uma aproximação
+    mapping = {'<2hours': 1, '2-4hours': 3, '4-6hours': 5, '>6hours': 7}
+    if cube.has('dailyusages'):
+        counts = cube.counts('base', 'dailyusages')
+        total = counts.sum()
+        weighted_avg = sum(mapping.get(k, 0) * v for k, v in counts.items()) / total
+        return f"{weighted_avg:.1f} horas"
+    return "N/A"
+
+def metrica_uso_educacional(cube):
+    if cube.has('mobilephoneuseforeducation'):
+        counts = cube.counts('educacao', 'mobilephoneuseforeducation', dropna=False)
+        frequently = counts[counts.index.str.lower().isin(['frequently', 'sometimes'])].sum() / counts.sum() * 100
+        return f"{frequently:.1f}%"
+    return "N/A"
+
+def metrica_sintomas(cube):
+    if cube.has('has_symptoms'):
+        # Considerando quem relatou pelo menos um sintoma
+        base = cube.cuboids['base']
+        has_symptoms = base['has_symptoms'].sum() / base['n'].sum() * 100
+        return f"{has_symptoms:.1f}%"
+    return "N/A"
+
+def metrica_impacto_saude(cube):
+    if cube.has('healthprecautions'):
+        # Alternativa se não tiver coluna específica
+        counts = cube.counts('precaucoes', 'healthprecautions')
+        takes_precautions = counts[counts.index.str.lower().str.contains('yes')].sum() / counts.sum() * 100
+        return f"{takes_precautions:.1f}%"
+    return "N/A"
+
+# Gráficos para Demografia
+def grafico_demografia(cube):
+    fig = make_subplots(rows=1, cols=2, 
+                       subplot_titles=("Distribuição por Gênero", "Distribuição por Faixa Etária"),
+                       specs=[[{"type": "pie"}, {"type": "bar"}]])
+    
+    # Gráfico de gênero
+    gender_counts = cube.counts('base', 'gender').sort_values(ascending=False)
+    fig.add_trace(go.Pie(
+        labels=gender_counts.index, 
+        values=gender_counts.values,
+        hole=0.4,
+        marker_colors=['#6e8efb', '#a777e3', '#63cdda'],
+        textinfo='percent+label'
+    ), row=1, col=1)
+    
+    # Gráfico de idade
+    age_counts = cube.counts('base', 'age').reindex(AGE_CATEGORIES, fill_value=0)
+    fig.add_trace(go.Bar(
+        x=age_counts.index, 
+        y=age_counts.values,
+        marker_color='#6e8efb',
+        text=age_counts.values,
+        textposition='auto'
+    ), row=1, col=2)
+    
+    fig.update_layout(
+        height=400,
+        margin=dict(l=10, r=10, t=60, b=40),
+        showlegend=False
+    )
+    return fig
+
+def grafico_uso_diario(cube):
+    # Contagem de tempo de uso por gênero e idade, em formato longo para plotly
+    if cube.has('dailyusages', 'gender', 'age'):
+        pivot_long = cube.counts('base', ['gender', 'age', 'dailyusages']).reset_index(name='Contagem')
+        pivot_long = pivot_long.rename(columns={'dailyusages': 'Tempo de Uso'})
+        
+        fig = px.bar(
+            pivot_long,
+            x='Tempo de Uso',
+            y='Contagem',
+            color='gender',
+            facet_col='age',
+            color_discrete_sequence=['#6e8efb', '#a777e3', '#63cdda'],
+            category_orders={
+                'age': AGE_CATEGORIES,
+                'Tempo de Uso': [c for c in DAILY_USAGE_CATEGORIES if c in set(pivot_long['Tempo de Uso'])],
+            },
+            labels={'gender': 'Gênero', 'age': 'Faixa Etária'},
+            title='Tempo de Uso Diário por Gênero e Faixa Etária'
+        )
+        
+        fig.update_layout(
+            height=400,
+            margin=dict(l=10, r=10, t=60, b=40),
+        )
+        return fig
+    
+    return go.Figure()
+
+# Gráficos para Uso Educacional
+def grafico_freq_edu(cube):
+    if cube.has('mobilephoneuseforeducation', 'gender'):
+        counts = cube.counts('educacao', ['mobilephoneuseforeducation', 'gender']).reset_index(name='count')
+        fig = px.bar(
+            counts, 
+            x='mobilephoneuseforeducation', 
+            y='count',
+            color='gender',
+            barmode='group',
+            color_discrete_sequence=['#6e8efb', '#a777e3', '#63cdda'],
+            category_orders={'mobilephoneuseforeducation': ['Frequently', 'Sometimes', 'Rarely', 'Never']},
+            title='Frequência de Uso para Educação por Gênero'
+        )
+        
+        fig.update_layout(
+            xaxis_title='Frequência de Uso',
+            yaxis_title='Contagem',
+            legend_title='Gênero',
+            height=400
+        )
+        return fig
+    
+    return go.Figure()
+
+def grafico_apps_edu(cube):
+    if cube.has('educationalapps'):
+        app_counts = cube.counts('apps', 'educationalapps').sort_values(ascending=True).tail(10)
+        
+        fig = go.Figure(go.Bar(
+            x=app_counts.values,
+            y=app_counts.index,
+            orientation='h',
+            marker_color='#6e8efb',
+            text=app_counts.values,
+            textposition='auto'
+        ))
+        
+        fig.update_layout(
+            title='Top 10 Aplicativos Educacionais Usados',
+            xaxis_title='Contagem',
+            yaxis_title='Aplicativo',
+            height=400
+        )
+        return fig
+    
+    return go.Figure()
+
+def grafico_correlacao_edu(cube):
+    # Aqui podemos tentar criar um gráfico de dispersão ou correlação
+    # entre uso educacional e alguma medida de desempenho
+    if cube.has('mobilephoneuseforeducation', 'performanceimpact'):
+        # Converter para matriz para heatmap
+        heatmap_data = cube.counts(
+            'edu_desempenho', ['mobilephoneuseforeducation', 'performanceimpact']
+        ).unstack(fill_value=0).sort_index().sort_index(axis=1)
+        
+        fig = px.imshow(
+            heatmap_data,
+            labels=dict(x="Impacto no Desempenho", y="Uso Educacional", color="Contagem"),
+            x=heatmap_data.columns,
+            y=heatmap_data.index,
+            color_continuous_scale=['#f5f7ff', '#6e8efb'],
+            text_auto=True
+        )
+        
+        fig.update_layout(
+            title='Correlação: Uso Educacional vs Impacto no Desempenho',
+            height=500
+        )
+        return fig
+    
+    return go.Figure()
+
+# Gráficos para Saúde e Sintomas
+def grafico_sintomas(cube):
+    if cube.has('symptom'):
+        symptom_counts = cube.counts('sintoma_item', 'symptom')
+        top_symptoms = symptom_counts.sort_values(ascending=True).tail(10)
+        
+        fig = go.Figure(go.Bar(
+            x=top_symptoms.values,
+            y=top_symptoms.index,
+            orientation='h',
+            marker_color='#a777e3',
+            text=top_symptoms.values,
+            textposition='auto'
+        ))
+        
+        fig.update_layout(
+            title='10 Sintomas Mais Relatados',
+            xaxis_title='Contagem',
+            yaxis_title='Sintoma',
+            height=400
+        )
+        return fig
+    
+    return go.Figure()
+
+def grafico_saude(cube):
+    if cube.has('simplified_health'):
+        health_counts = cube.counts('saude', 'simplified_health')
+        
+        # Determinar ordem das categorias (assumindo que são Excellent, Good, Fair, Poor)
+        categories = ['Excellent', 'Good', 'Fair', 'Poor']
+        categories = [c for c in categories if c in health_counts.index]
+        
+        # Reorganizar baseado na ordem determinada
+        health_counts = health_counts.reindex(categories)
+        
+        fig = px.bar(
+            x=health_counts.index,
+            y=health_counts.values,
+            color=health_counts.index,
+            color_discrete_map={
+                'Excellent': '#4caf50',
+                'Good': '#8bc34a',
+                'Fair': '#ffc107',
+                'Poor': '#f44336'
+            },
+            labels={'x': 'Classificação', 'y': 'Contagem'},
+            title='Autoavaliação da Saúde'
+        )
+        
+        fig.update_layout(
+            showlegend=False,
+            height=400
+        )
+        return fig
+    
+    return go.Figure()
+
+def grafico_precaucao(cube):
+    if cube.has('healthprecautions'):
+        precaution_counts = cube.counts('precaucoes', 'healthprecautions').sort_values(ascending=False)
+        
+        fig = px.pie(
+            values=precaution_counts.values,
+            names=precaution_counts.index,
+            hole=0.4,
+            color_discrete_sequence=px.colors.sequential.Bluyl,
+            title='Precauções de Saúde Adotadas'
+        )
+        
+        fig.update_layout(
+            height=450
+        )
+        return fig
+    
+    return go.Figure()
+
+# Gráficos para Relações
+def grafico_uso_vs_saude(cube):
+    
+    # Tentar criar um gráfico relacionando tempo de uso e saúde
+    if cube.has('dailyusages', 'simplified_health'):
+        # Contagem para cada combinação
+        counts = cube.counts('saude', ['dailyusages', 'simplified_health']).unstack(fill_value=0)
+        health_by_usage = counts.div(counts.sum(axis=1), axis=0) * 100
+        
+        # Ordenar índices
+        health_by_usage = health_by_usage.reindex([c for c in DAILY_USAGE_CATEGORIES if c in health_by_usage.index])
+        
+        # Converter para formato longo para plotly
+        health_long = health_by_usage.rename_axis(index='dailyusages', columns=None).reset_index().melt(
+            id_vars=['dailyusages'],
+            var_name='Health Rating',
+            value_name='Percentage'
+        )
+        
+        fig = px.bar(
+            health_long,
+            x='dailyusages',
+            y='Percentage',
+            color='Health Rating',
+            barmode='stack',
+            color_discrete_map={
+                'Excellent': '#4caf50',
+                'Good': '#8bc34a',
+                'Fair': '#ffc107',
+                'Poor': '#f44336'
+            },
+            labels={'dailyusages': 'Tempo de Uso Diário', 'Percentage': 'Porcentagem (%)'},
+            title='Avaliação de Saúde por Tempo de Uso Diário'
+        )
+        
+        fig.update_layout(
+            height=400
+        )
+        return fig
+    
+    return go.Figure()
+
+def grafico_sintomas_vs_precaucoes(cube):
+    
+    # Tentar criar um gráfico relacionando sintomas e precauções
+    if cube.has('symptom_count', 'healthprecautions'):
+        # Média de sintomas por precaução, a partir das somas do cubo
+        totals = cube.counts('precaucoes', 'healthprecautions', value=['symptom_count', 'n'])
+        symptom_by_precaution = (totals['symptom_count'] / totals['n']).sort_values()
+        
+        fig = go.Figure(go.Bar(
+            x=symptom_by_precaution.index,
+            y=symptom_by_precaution.values,
+            marker_color='#a777e3',
+            text=symptom_by_precaution.values.round(1),
+            textposition='auto'
+        ))
+        
+        fig.update_layout(
+            title='Média de Sintomas Reportados por Tipo de Precaução',
+            xaxis_title='Precaução',
+            yaxis_title='Média de Sintomas',
+            height=400
+        )
+        return fig
+    
+    return go.Figure()
+
+# Gráficos do app_deploy: barras e pizza sobre contagens do cubo, então o JSON
+# enviado ao navegador tem uma linha por categoria e não uma por respondente
+def _contagens(cube, name, dims):
+    return cube.counts(name, dims).sort_index().reset_index(name='count')
+
+def _barras_por_genero(cube, name, col, title, **kwargs):
+    if not cube.has(col, 'gender'):
+        return go.Figure()
+    counts = _contagens(cube, name, [col, 'gender'])
+    return px.bar(counts, x=col, y='count', color='gender', title=title, **kwargs)
+
+def grafico_genero(cube):
+    if not cube.has('gender'):
+        return go.Figure()
+    counts = _contagens(cube, 'base', 'gender')
+    return px.pie(counts, names='gender', values='count', title="Distribuição por Gênero", hole=0.3)
+
+def grafico_idade(cube):
+    if not cube.has('age'):
+        return go.Figure()
+    counts = _contagens(cube, 'base', 'age')
+    return px.bar(counts, x='age', y='count', color='age', title="Distribuição por Faixa Etária")
+
+def grafico_uso_diario_genero(cube):
+    return _barras_por_genero(cube, 'base', 'dailyusages', "Tempo de Uso Diário por Gênero", barmode="group")
+
+def grafico_freq_edu_genero(cube):
+    return _barras_por_genero(cube, 'educacao', 'mobilephoneuseforeducation', "Frequência de Uso para Educação")
+
+def grafico_apps_edu_genero(cube):
+    return _barras_por_genero(cube, 'apps', 'educationalapps', "Tipos de Aplicativos Educacionais")
+
+def grafico_sintomas_genero(cube):
+    if not cube.has('simplified_symptoms', 'gender'):
+        return go.Figure()
+    rotulos = {"All of these": "Todos", "Multiple": "Múltiplos", "Not specified": "Não especificado"}
+    counts = _contagens(cube, 'sintomas', ['simplified_symptoms', 'gender'])
+    counts['sintomas'] = counts.pop('simplified_symptoms').map(lambda v: rotulos.get(v, v))
+    return px.bar(counts, x='sintomas', y='count', color='gender', title="Sintomas Relatados pelo Uso do Celular")
+
+def grafico_precaucao_genero(cube):
+    return _barras_por_genero(cube, 'precaucoes', 'healthprecautions', "Precauções de Saúde Adotadas")
+
+def grafico_saude_genero(cube):
+    return _barras_por_genero(cube, 'saude', 'simplified_health', "Autoavaliação da Saúde",
+                              labels={"simplified_health": "avaliacao"})
+
+# Registro das saídas: id da saída no app -> função que a constrói
+METRICAS = {
+    "metrica_tempo_medio": metrica_tempo_medio,
+    "metrica_uso_educacional": metrica_uso_educacional,
+    "metrica_sintomas": metrica_sintomas,
+    "metrica_impacto_saude": metrica_impacto_saude,
+}
+
+FIGURAS = {
+    "grafico_demografia": grafico_demografia,
+    "grafico_uso_diario": grafico_uso_diario,
+    "grafico_freq_edu": grafico_freq_edu,
+    "grafico_apps_edu": grafico_apps_edu,
+    "grafico_correlacao_edu": grafico_correlacao_edu,
+    "grafico_sintomas": grafico_sintomas,
+    "grafico_saude": grafico_saude,
+    "grafico_precaucao": grafico_precaucao,
+    "grafico_uso_vs_saude": grafico_uso_vs_saude,
+    "grafico_sintomas_vs_precaucoes": grafico_sintomas_vs_precaucoes,
+}
+
+# Saídas do app_deploy (os ids coincidem com os do dashboard, mas são outro app)
+FIGURAS_DEPLOY = {
+    "grafico_genero": grafico_genero,
+    "grafico_idade": grafico_idade,
+    "grafico_uso_diario": grafico_uso_diario_genero,
+    "grafico_freq_edu": grafico_freq_edu_genero,
+    "grafico_apps_edu": grafico_apps_edu_genero,
+    "grafico_sintomas": grafico_sintomas_genero,
+    "grafico_precaucao": grafico_precaucao_genero,
+    "grafico_saude": grafico_saude_genero,
+}
@@ -0,0 +1,178 @@
+import os
+import json
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+# Estágio de gráficos da análise em lote: cada figura (distribuições e matriz
+# de correlação) é renderizada num pool de processos com o backend Agg. Os
+# dados de entrada de cada figura são agregados pequenos (contagens ou a
+# matriz), então o hash do conteúdo diz se o PNG do último run ainda vale.
+
+PLOTS_DIR = 'plots'
+MANIFEST = 'manifesto_graficos.json'
+
+# Entra no hash: mudar o estilo ou o desenho das figuras invalida os PNGs
+RENDER_VERSION = 1
+STYLE = {'style': 'ggplot', 'palette': 'Set2'}
+
+
+# Uma figura a renderizar: `kind` escolhe a função de desenho e `data` é uma
+# Series de contagens ou a matriz de correlação
+class PlotJob:
+    def __init__(self, name, kind, title, data, dpi=300):
+        self.name = name
+        self.kind = kind
+        self.title = title
+        self.data = data
+        self.dpi = dpi
+
+    @property
+    def digest(self):
+        payload = json.dumps({
+            'versao': RENDER_VERSION,
+            'estilo': STYLE,
+            'tipo': self.kind,
+            'titulo': self.title,
+            'dpi': self.dpi,
+            'dados': _content(self.data),
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# Só rótulos e valores entram no hash (não o nome ou o dtype da Series), com
+# arredondamento que absorve o ruído de ponto flutuante entre os modos da análise
+def _content(data):
+    frame = data.to_frame() if hasattr(data, 'to_frame') else data
+    return {
+        'indice': [str(label) for label in frame.index],
+        'colunas': [str(col) for col in frame.columns] if frame.shape[1] > 1 else [],
+        'valores': [[None if value != value else round(float(value), 12) for value in row]
+                    for row in frame.to_numpy(dtype=float)],
+    }
+
+
+def distribution_job(title, col, counts):
+    return PlotJob(f'distribuicao_{col}.png', 'distribuicao', title, counts, dpi=150)
+
+
+def heatmap_job(title, corr):
+    return PlotJob('correlacao_uso_celular.png', 'correlacao', title, corr)
+
+
+# Inicialização de cada worker: backend sem janela, estilo e cache de fontes
+# carregados uma vez, e não a cada figura
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.style.use(STYLE['style'])
+    sns.set_palette(STYLE['palette'])
+    fig = plt.figure(figsize=(1, 1))
+    fig.text(0.5, 0.5, 'Aa 0.1%', fontweight='bold')
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def _render_distribution(job, path):
+    import matplotlib.pyplot as plt
+
+    dist = job.data / job.data.sum() * 100
+    dist = dist.iloc[::-1]
+    fig, ax = plt.subplots(figsize=(8, max(3, 0.4 * len(dist) + 1.5)))
+    ax.barh(dist.index.astype(str), dist.values)
+    for y, value in enumerate(dist.values):
+        ax.text(value, y, f' {value:.1f}%', va='center', fontsize=9)
+    ax.set_xlabel('% dos respondentes')
+    ax.set_title(job.title)
+    fig.tight_layout()
+    fig.savefig(path, dpi=job.dpi)
+    plt.close(fig)
+
+
+def _render_heatmap(job, path):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=(10, 8))
+    sns.heatmap(job.data, annot=True, cmap='coolwarm', center=0)
+    plt.title(job.title)
+    plt.tight_layout()
+    plt.savefig(path, dpi=job.dpi)
+    plt.close()
+
+
+RENDERERS = {
+    'distribuicao': _render_distribution,
+    'correlacao': _render_heatmap,
+}
+
+
+def _render(job, plots_dir):
+    RENDERERS[job.kind](job, os.path.join(plots_dir, job.name))
+    return job.name
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Uma entrada do manifesto vale se o hash dos dados bate e o PNG em disco é o
+# mesmo que foi gravado (um arquivo substituído ou restaurado é redesenhado)
+def _up_to_date(entry, digest, path):
+    if not isinstance(entry, dict) or entry.get('dados') != digest:
+        return False
+    try:
+        return file_digest(path) == entry.get('arquivo')
+    except OSError:
+        return False
+
+
+def load_manifest(plots_dir=PLOTS_DIR):
+    try:
+        with open(os.path.join(plots_dir, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, plots_dir=PLOTS_DIR):
+    path = os.path.join(plots_dir, MANIFEST)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+# Renderiza só as figuras cujo hash mudou ou cujo PNG sumiu ou foi alterado;
+# `force` ignora o manifesto
+def render_plots(jobs, workers=None, plots_dir=PLOTS_DIR, force=False):
+    os.makedirs(plots_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(plots_dir)
+    digests = {job.name: job.digest for job in jobs}
+    pending = [
+        job for job in jobs
+        if force or not _up_to_date(manifest.get(job.name), digests[job.name], os.path.join(plots_dir, job.name))
+    ]
+    skipped = len(jobs) - len(pending)
+    if not pending:
+        logging.info(f"Gráficos inalterados desde o último run ({skipped} figuras), nada a renderizar")
+        return []
+
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    logging.info(f"Renderizando {len(pending)} gráficos com {workers} processos ({skipped} inalterados)...")
+    rendered = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for name in pool.map(_render, pending, [plots_dir] * len(pending)):
+                manifest[name] = {'dados': digests[name], 'arquivo': file_digest(os.path.join(plots_dir, name))}
+                rendered.append(name)
+    finally:
+        # O que já foi gravado entra no manifesto mesmo se outra figura falhar
+        save_manifest(manifest, plots_dir)
+    return rendered
@@ -0,0 +1,88 @@
+from collections import Counter
+
+from preparacao import IMPUTED_COLUMNS, ORDERED_CATEGORIES
+
+# Acima deste número de valores distintos a coluna deixa de ter contagem exata e
+# passa a guardar só os candidatos a mais frequentes (Misra-Gries)
+MAX_EXACT = 10_000
+HEAVY_HITTERS = 1_000
+
+
+# Rótulos na ordem do categórico lido do arquivo inteiro: a ordem da escala nas
+# ordinais, a alfabética nas demais (o mesmo desempate de Series.mode())
+def category_order(col, labels):
+    order = ORDERED_CATEGORIES.get(col)
+    return [c for c in order if c in labels] if order else sorted(labels)
+
+
+# Frequências de uma coluna, atualizadas com contagens por bloco. Enquanto a
+# cardinalidade é baixa as contagens são exatas; depois viram um resumo
+# Misra-Gries com `capacity` contadores: qualquer valor com frequência acima de
+# n / (capacity + 1) continua presente, com contagem subestimada em no máximo
+# `error`. O resumo é mesclável, então blocos e workers podem ser combinados.
+class FrequencySketch:
+    def __init__(self, max_exact=MAX_EXACT, capacity=HEAVY_HITTERS):
+        self.max_exact = max_exact
+        self.capacity = capacity
+        self.counts = Counter()
+        self.exact = True
+        self.total = 0
+        self.error = 0
+
+    def update(self, counts):
+        counts = {label: n for label, n in counts.items() if n > 0}
+        self.counts.update(counts)
+        self.total += sum(counts.values())
+        if self.exact and len(self.counts) > self.max_exact:
+            self.exact = False
+        if not self.exact and len(self.counts) > self.capacity:
+            self._reduce()
+
+    # Passo de redução do Misra-Gries: desconta de todos os contadores o
+    # (capacity + 1)-ésimo maior e descarta os que zeram
+    def _reduce(self):
+        cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+        self.error += cut
+        self.counts = Counter({label: n - cut for label, n in self.counts.items() if n > cut})
+
+    def merge(self, other):
+        self.exact = self.exact and other.exact
+        self.error += other.error
+        self.total += other.total
+        self.counts.update(other.counts)
+        if self.exact and len(self.counts) > self.max_exact:
+            self.exact = False
+        if not self.exact and len(self.counts) > self.capacity:
+            self._reduce()
+        return self
+
+    def mode(self, col=None):
+        if not self.counts:
+            return None
+        return max(category_order(col, self.counts), key=lambda label: self.counts[label])
+
+
+# Modas das colunas imputadas coletadas na mesma leitura que limpa os dados
+class ModeImputer:
+    def __init__(self, columns=IMPUTED_COLUMNS, max_exact=MAX_EXACT, capacity=HEAVY_HITTERS):
+        self.columns = list(columns)
+        self.sketches = {col: FrequencySketch(max_exact, capacity) for col in self.columns}
+
+    def update(self, df):
+        for col in self.columns:
+            if col in df.columns:
+                self.sketches[col].update(df[col].value_counts(sort=False).to_dict())
+
+    def merge(self, other):
+        for col, sketch in other.sketches.items():
+            if col in self.sketches:
+                self.sketches[col].merge(sketch)
+            else:
+                self.sketches[col] = sketch
+        return self
+
+    def modes(self):
+        return {col: sketch.mode(col) for col, sketch in self.sketches.items()}
+
+    def approximate_columns(self):
+        return [col for col, sketch in self.sketches.items() if not sketch.exact]
@@ -0,0 +1,136 @@
+import os
+import glob
+import shutil
+import logging
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import repeat
+
+from blocos import DEFAULT_CHUNKSIZE, ChunkProcessor, iter_chunks, warn_approximate
+from imputacao import ModeImputer
+
+# Ingestão de vários arquivos regionais (CSV, Excel ou Parquet) em paralelo.
+# Cada worker limpa um arquivo inteiro em blocos e devolve só os acumuladores
+# (contagens, frequências das colunas imputadas, estatísticas da correlação);
+# o processo principal mescla tudo, calcula as modas globais e manda os
+# workers fecharem os blocos imputados com as modas parciais; só os blocos em
+# que a moda de uma coluna imputada mudou são refeitos.
+
+INPUT_EXTENSIONS = ('.csv', '.xlsx', '.xls', '.parquet')
+
+
+# Diretório (todos os arquivos suportados dentro dele) ou padrão glob
+def expand_inputs(pattern):
+    if os.path.isdir(pattern):
+        paths = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+    else:
+        paths = glob.glob(pattern)
+    return sorted(path for path in paths if path.endswith(INPUT_EXTENSIONS) and os.path.isfile(path))
+
+
+def is_multi_input(path):
+    return os.path.isdir(path) or glob.has_magic(path)
+
+
+# Resultado de um arquivo: o processador com os acumuladores e as medidas de leitura
+class FileReport:
+    def __init__(self, path, processor, rows, seconds):
+        self.path = path
+        self.processor = processor
+        self.rows = rows
+        self.seconds = seconds
+        self.bytes = os.path.getsize(path)
+
+    def summary(self):
+        return {
+            "arquivo": self.path,
+            "linhas": self.rows,
+            "bytes": self.bytes,
+            "segundos": round(self.seconds, 3),
+            "linhas_por_segundo": round(self.rows / self.seconds) if self.seconds else None,
+            "mb_por_segundo": round(self.bytes / 2**20 / self.seconds, 2) if self.seconds else None,
+        }
+
+
+def _ingest_file(path, part_path, distribution_columns, scores, levels, chunksize):
+    start = time.perf_counter()
+    processor = ChunkProcessor(part_path, distribution_columns, scores, levels, path, chunksize)
+    rows = 0
+    for chunk in iter_chunks(path, chunksize):
+        rows += len(chunk)
+        processor.feed(chunk)
+    return FileReport(path, processor, rows, time.perf_counter() - start)
+
+
+def _finish_file(processor, modes):
+    return processor.finish(modes)
+
+
+# Junta as partes limpas num único CSV, na ordem dos arquivos de entrada
+def _concat_parts(parts, output_path):
+    header = None
+    with open(output_path, "w", encoding="utf-8", newline="") as out:
+        for part in parts:
+            if not os.path.exists(part):
+                continue
+            with open(part, encoding="utf-8", newline="") as f:
+                first = f.readline()
+                if header is None:
+                    header = first
+                    out.write(first)
+                elif first != header:
+                    raise ValueError(f"Colunas de {part} diferem das do primeiro arquivo")
+                shutil.copyfileobj(f, out)
+
+
+def ingest_files(pattern, output_path, distribution_columns, scores, levels=None,
+                 workers=None, chunksize=DEFAULT_CHUNKSIZE):
+    paths = expand_inputs(pattern)
+    if not paths:
+        raise FileNotFoundError(f"Nenhum arquivo CSV, Excel ou Parquet em {pattern}")
+    logging.info(f"Ingerindo {len(paths)} arquivos com {workers or os.cpu_count()} processos...")
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as work_dir, ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = [os.path.join(work_dir, f"parte_{i:05d}.csv") for i in range(len(paths))]
+        futures = {
+            pool.submit(_ingest_file, path, part, distribution_columns, scores, levels, chunksize): i
+            for i, (path, part) in enumerate(zip(paths, parts))
+        }
+        reports = [None] * len(paths)
+        for future in as_completed(futures):
+            report = future.result()
+            reports[futures[future]] = report
+            s = report.summary()
+            logging.info(f"{s['arquivo']}: {s['linhas']} linhas em {s['segundos']} s "
+                         f"({s['linhas_por_segundo']} linhas/s, {s['mb_por_segundo']} MB/s)")
+
+        # Modas do conjunto inteiro a partir das frequências mescladas
+        imputer = ModeImputer()
+        for report in reports:
+            imputer.merge(report.processor.imputer)
+        warn_approximate(imputer)
+        modes = imputer.modes()
+
+        # Blocos imputados de cada arquivo fechados em paralelo com as modas globais
+        processors = [report.processor for report in reports]
+        pending = [i for i, processor in enumerate(processors) if processor.pending]
+        changed = set()
+        finished = pool.map(_finish_file, [processors[i] for i in pending], repeat(modes))
+        for i, (processor, columns) in zip(pending, finished):
+            processors[i] = processor
+            changed.update(columns)
+        if changed:
+            logging.info(f"Moda global diferente da parcial de algum arquivo em {', '.join(sorted(changed))}: "
+                         f"blocos afetados refeitos")
+
+        total = ChunkProcessor(output_path, distribution_columns, scores, levels)
+        for processor in processors:
+            total.merge(processor)
+        _concat_parts(parts, output_path)
+
+    elapsed = time.perf_counter() - start
+    logging.info(f"Ingestão concluída: {total.rows} linhas de {len(paths)} arquivos em {elapsed:.1f} s "
+                 f"({total.rows / elapsed:,.0f} linhas/s)")
+    return total.rows, total.counts, total.correlation, [report.summary() for report in reports]
@@ -0,0 +1,224 @@
+import os
+import time
+import platform
+import threading
+from contextlib import contextmanager
+
+# Só existe em sistemas Unix; sem ele (Windows) as métricas de memória do
+# processo não são publicadas
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Instrumentação dos caminhos quentes (carga dos dados, construção e
+# renderização das figuras, cache, sessões). Os apps expõem o registro em
+# /metrics no formato texto do Prometheus; o CLI grava um resumo em JSON.
+
+PREFIX = "saudecelular"
+
+# Limites dos histogramas: latência em segundos e tamanho em bytes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Descrição de cada métrica: nome -> (tipo, ajuda)
+DESCRICOES = {
+    "render_seconds": ("histogram", "Latência de cada saída do app, do pedido ao valor pronto"),
+    "figure_build_seconds": ("histogram", "Tempo de construção e serialização de uma figura"),
+    "figure_bytes": ("histogram", "Tamanho do JSON de cada figura construída"),
+    "figure_cache_entries": ("gauge", "Figuras no cache do processo"),
+    "figure_cache_bytes": ("gauge", "Bytes de JSON no cache de figuras"),
+    "figure_cache_hits_total": ("counter", "Acertos do cache de figuras"),
+    "figure_cache_misses_total": ("counter", "Faltas do cache de figuras"),
+    "figure_cache_evictions_total": ("counter", "Figuras descartadas pelo limite do cache"),
+    "figure_cache_hit_ratio": ("gauge", "Taxa de acerto do cache de figuras"),
+    "coalesced_requests_total": ("counter", "Pedidos atendidos por uma execução já em andamento"),
+    "inflight_tasks": ("gauge", "Execuções em andamento no pool de tarefas"),
+    "data_load_seconds": ("histogram", "Tempo de carga e preparação do dataset"),
+    "data_rows": ("gauge", "Linhas do dataset carregado"),
+    "data_reloads_total": ("counter", "Recargas do dataset publicadas"),
+    "data_reload_failures_total": ("counter", "Recargas do dataset que falharam"),
+    "sessions_total": ("counter", "Sessões abertas desde o início do processo"),
+    "sessions_active": ("gauge", "Sessões abertas no momento"),
+    "session_bytes": ("gauge", "Memória dos agregados retidos por sessão (recorte do cubo)"),
+    "process_resident_bytes": ("gauge", "Memória residente do processo"),
+    "process_peak_resident_bytes": ("gauge", "Pico de memória residente do processo"),
+    "stage_seconds": ("histogram", "Duração de cada etapa da análise em lote"),
+    "ingest_file_rows": ("gauge", "Linhas lidas de cada arquivo na ingestão paralela"),
+    "ingest_file_seconds": ("gauge", "Tempo de leitura e limpeza de cada arquivo na ingestão paralela"),
+    "ingest_file_rows_per_second": ("gauge", "Vazão de cada arquivo na ingestão paralela, em linhas/s"),
+    "ingest_file_megabytes_per_second": ("gauge", "Vazão de cada arquivo na ingestão paralela, em MB/s"),
+}
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if platform.system() == "Darwin" else peak * 1024
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Registro de métricas do processo. Contadores e medidores guardam um valor
+# por combinação de rótulos; histogramas, contagens cumulativas por limite.
+# Coletores são chamados a cada leitura, para métricas lidas de outros objetos.
+class Metrics:
+    def __init__(self, prefix=PREFIX):
+        self.prefix = prefix
+        self.values = {}
+        self.histograms = {}
+        self.collectors = []
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.values[(name, _labels(labels))] = value
+
+    def remove(self, name, **labels):
+        with self._lock:
+            self.values.pop((name, _labels(labels)), None)
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def collector(self, func):
+        self.collectors.append(func)
+        return func
+
+    def collect(self):
+        for name, value in (("process_resident_bytes", rss_bytes()),
+                            ("process_peak_resident_bytes", peak_rss_bytes())):
+            if value is not None:
+                self.set(name, value)
+        for func in self.collectors:
+            func(self)
+
+    # Formato texto de exposição do Prometheus (versão 0.0.4)
+    def prometheus(self):
+        self.collect()
+        with self._lock:
+            values = sorted(self.values.items())
+            histograms = sorted(self.histograms.items())
+
+        lines, described = [], set()
+
+        def header(name):
+            if name not in described:
+                described.add(name)
+                kind, text = DESCRICOES.get(name, ("untyped", ""))
+                lines.append(f"# HELP {self.prefix}_{name} {text}")
+                lines.append(f"# TYPE {self.prefix}_{name} {kind}")
+
+        for (name, labels), value in values:
+            header(name)
+            lines.append(f"{self.prefix}_{name}{_format_labels(labels)} {_number(value)}")
+        for (name, labels), histogram in histograms:
+            header(name)
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f"{self.prefix}_{name}_bucket{_format_labels(labels, [('le', _number(bound))])} {count}")
+            lines.append(f"{self.prefix}_{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram.count}")
+            lines.append(f"{self.prefix}_{name}_sum{_format_labels(labels)} {_number(histogram.sum)}")
+            lines.append(f"{self.prefix}_{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    # Resumo estruturado: uma entrada por série, histogramas com contagem, soma, média e máximo
+    def summary(self):
+        self.collect()
+        with self._lock:
+            series = [
+                {"metrica": name, "rotulos": dict(labels), "tipo": DESCRICOES.get(name, ("untyped",))[0], "valor": value}
+                for (name, labels), value in sorted(self.values.items())
+            ]
+            series += [
+                {"metrica": name, "rotulos": dict(labels), "tipo": "histogram", "contagem": h.count,
+                 "soma": h.sum, "media": h.sum / h.count if h.count else None, "maximo": h.max}
+                for (name, labels), h in sorted(self.histograms.items())
+            ]
+        return series
+
+    def clear(self):
+        with self._lock:
+            self.values.clear()
+            self.histograms.clear()
+
+
+metrics = Metrics()
+
+
+# App ASGI com /metrics na frente do app Shiny. O Mount não repassa o lifespan
+# ao app montado, então o do Shiny é usado no app externo para que os
+# callbacks de `App.on_shutdown` rodem quando o servidor encerra
+def with_metrics_endpoint(shiny_app, registry=metrics):
+    from starlette.applications import Starlette
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Mount, Route
+
+    def endpoint(request):
+        return PlainTextResponse(registry.prometheus(), media_type="text/plain; version=0.0.4")
+
+    return Starlette(
+        routes=[Route("/metrics", endpoint), Mount("/", app=shiny_app)],
+        lifespan=shiny_app.starlette_app.router.lifespan_context,
+    )
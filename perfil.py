@@ -0,0 +1,231 @@
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+# Modo de perfil da análise em lote (--profile). Cada etapa roda sob cProfile
+# e tracemalloc, e um amostrador por SIGPROF grava as pilhas no formato
+# "folded" (flamegraph.pl, speedscope). Desligado, `stage` e `step` não fazem
+# nada, então as chamadas podem ficar no caminho normal da análise; cProfile e
+# pstats só são importados quando o perfil é usado.
+
+# Intervalo de amostragem das pilhas, em segundos de CPU
+SAMPLE_INTERVAL = 0.005
+
+# Quadros guardados por alocação e linhas listadas por etapa no relatório
+TRACE_FRAMES = 1
+TOP = 8
+
+MIB = 1024 * 1024
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+# Pilhas amostradas pelo sinal SIGPROF (tempo de CPU do processo). Cada pilha
+# começa pela etapa em andamento, para o flamegraph agrupar por etapa. Só a
+# thread principal é amostrada; processos dos pools não entram.
+class StackSampler:
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.label = "fora das etapas"
+        self._labels = {}
+        self._previous = None
+
+    @staticmethod
+    def available():
+        return hasattr(signal, "SIGPROF") and hasattr(signal, "setitimer")
+
+    def start(self):
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous or signal.SIG_DFL)
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _frame_label(code)
+            stack.append(label)
+            frame = frame.f_back
+        stack.append(f"etapa:{self.label}")
+        self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    def __init__(self):
+        self.active = False
+        self.stages = []
+        self.sampler = None
+        self._current = None
+
+    def start(self, sample=True):
+        self.active = True
+        self.stages = []
+        tracemalloc.start(TRACE_FRAMES)
+        if sample and StackSampler.available():
+            self.sampler = StackSampler()
+            self.sampler.start()
+        elif sample:
+            logging.warning("Amostragem de pilhas indisponível nesta plataforma (sem SIGPROF)")
+
+    def stop(self):
+        if self.sampler is not None:
+            self.sampler.stop()
+        tracemalloc.stop()
+        self.active = False
+
+    # Uma etapa: tempo de parede, memória alocada (líquida e pico) e as
+    # funções com mais tempo próprio e as linhas que mais alocaram
+    @contextmanager
+    def stage(self, name):
+        if not self.active or self._current is not None:
+            yield
+            return
+
+        record = {"etapa": name, "passos": []}
+        self._current = record
+        import cProfile
+
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        profile = cProfile.Profile()
+        if self.sampler is not None:
+            self.sampler.label = name
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            record["segundos"] = time.perf_counter() - start
+            if self.sampler is not None:
+                self.sampler.label = "fora das etapas"
+            current, peak = tracemalloc.get_traced_memory()
+            record["alocado_bytes"] = current - base
+            record["pico_bytes"] = peak - base
+            record["funcoes"] = _top_functions(profile)
+            record["alocacoes"] = _top_allocations(tracemalloc.take_snapshot(), before)
+            record["perfil"] = profile
+            self.stages.append(record)
+            self._current = None
+
+    # Um passo dentro da etapa (ex.: cada distribuição do `show`): só tempo e memória
+    @contextmanager
+    def step(self, name):
+        if self._current is None:
+            yield
+            return
+        base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._current["passos"].append({
+                "passo": name,
+                "segundos": time.perf_counter() - start,
+                "alocado_bytes": tracemalloc.get_traced_memory()[0] - base,
+            })
+
+    def report(self):
+        lines = ["Perfil por etapa (os tempos incluem a sobrecarga do cProfile/tracemalloc):",
+                 f"{'etapa':<14}{'tempo (s)':>11}{'alocado (MiB)':>15}{'pico (MiB)':>12}"]
+        for record in self.stages:
+            lines.append(f"{record['etapa']:<14}{record['segundos']:>11.3f}"
+                         f"{record['alocado_bytes'] / MIB:>15.2f}{record['pico_bytes'] / MIB:>12.2f}")
+        for record in self.stages:
+            lines.append(f"\n[{record['etapa']}] funções com mais tempo próprio:")
+            for item in record["funcoes"]:
+                lines.append(f"  {item['proprio_s']:8.4f}s {item['acumulado_s']:8.4f}s {item['chamadas']:>8}  {item['funcao']}")
+            lines.append(f"[{record['etapa']}] linhas que mais alocaram:")
+            for item in record["alocacoes"]:
+                lines.append(f"  {item['bytes'] / MIB:8.2f} MiB {item['blocos']:>8}  {item['linha']}")
+            steps = sorted(record["passos"], key=lambda s: s["segundos"], reverse=True)[:TOP]
+            if steps:
+                lines.append(f"[{record['etapa']}] passos mais lentos:")
+                for item in steps:
+                    lines.append(f"  {item['segundos']:8.4f}s {item['alocado_bytes'] / MIB:8.2f} MiB  {item['passo']}")
+        return "\n".join(lines)
+
+    # Grava perfil.json, um .prof por etapa (pstats/snakeviz) e as pilhas em pilhas.folded
+    def save(self, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        summary = []
+        for record in self.stages:
+            record["perfil"].dump_stats(os.path.join(output_dir, f"{record['etapa']}.prof"))
+            summary.append({k: v for k, v in record.items() if k != "perfil"})
+        with open(os.path.join(output_dir, "perfil.json"), "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "etapas": summary}, f, indent=2, ensure_ascii=False)
+        if self.sampler is not None:
+            self.sampler.write(os.path.join(output_dir, "pilhas.folded"))
+        logging.info(f"Perfil salvo em {output_dir} (perfil.json, <etapa>.prof"
+                     f"{', pilhas.folded' if self.sampler is not None else ''})")
+
+
+# O próprio amostrador roda dentro das etapas; suas funções e alocações saem do relatório
+def _own_files():
+    import cProfile
+    return (__file__, cProfile.__file__, tracemalloc.__file__)
+
+
+def _top_functions(profile, limit=TOP):
+    import pstats
+
+    own = _own_files()
+    stats = pstats.Stats(profile).stats
+    rows = [item for item in stats.items() if item[0][0] not in own]
+    rows = sorted(rows, key=lambda item: item[1][2], reverse=True)[:limit]
+    return [
+        {"funcao": f"{func} ({os.path.basename(path)}:{line})" if line else func,
+         "chamadas": calls, "proprio_s": own, "acumulado_s": cumulative}
+        for (path, line, func), (_, calls, own, cumulative, _) in rows
+    ]
+
+
+def _top_allocations(after, before, limit=TOP):
+    filters = [tracemalloc.Filter(False, path) for path in _own_files()]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    rows = sorted(diff, key=lambda stat: stat.size_diff, reverse=True)[:limit]
+    return [
+        {"linha": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+         "bytes": stat.size_diff, "blocos": stat.count_diff}
+        for stat in rows if stat.size_diff > 0
+    ]
+
+
+profiler = Profiler()
+
+
+# Processos criados por fork durante o perfil (pools de gráficos e de ingestão)
+# herdariam o tracemalloc e o gancho do cProfile da thread que os criou, e
+# ficariam várias vezes mais lentos sem que nada deles entre no relatório
+def _after_fork_in_child():
+    if profiler.active:
+        sys.setprofile(None)
+        tracemalloc.stop()
+        if profiler.sampler is not None:
+            signal.signal(signal.SIGPROF, signal.SIG_DFL)
+        profiler.active = False
+        profiler.sampler = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
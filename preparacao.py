@@ -0,0 +1,449 @@
+import os
+import copy
+import json
+import functools
+import threading
+import logging
+from importlib.util import find_spec
+
+import numpy as np
+import pandas as pd
+
+from metricas import metrics
+from derivacoes import MultiLabel, add_derived_features, encode_multilabels
+
+# pyarrow só é importado nas funções de snapshot: os apps importam este módulo
+# na partida e só leem o snapshot depois, na carga em segundo plano
+HAS_PYARROW = find_spec("pyarrow") is not None
+CSV_ENGINE = "pyarrow" if HAS_PYARROW else "c"
+
+# Leitor de Excel em Rust, bem mais rápido que o openpyxl, quando instalado
+EXCEL_ENGINE = "calamine" if find_spec("python_calamine") is not None else None
+
+DATA_PATH = "saudevscelular.csv"
+
+# Incrementar quando a preparação mudar, para invalidar snapshots antigos
+SNAPSHOT_VERSION = 3
+SNAPSHOT_SUFFIX = ".arrow"
+
+AGE_CATEGORIES = ["16-20", "21-25", "26-30", "31-35"]
+DAILY_USAGE_CATEGORIES = ['<2hours', '2-4hours', '4-6hours', '>6hours']
+FREQUENCY_CATEGORIES = ['Never', 'Rarely', 'Sometimes', 'Frequently']
+
+# Esquema do CSV. Colunas de texto livre ficam como string; todas as demais são
+# lidas direto como categoria. As ordinais recebem a ordem da escala e rótulos sem
+# espaços ("4-6 hours" -> "4-6hours"), o formato usado pelos mapeamentos numéricos.
+TEXT_COLUMNS = ["names"]
+EXCLUDED_NAMES = ["Mehvish"]
+
+# Colunas categóricas com valores ausentes preenchidos pela moda
+IMPUTED_COLUMNS = ['gender', 'mobileoperatingsystem', 'mobilephoneuseforeducation',
+                   'mobilephoneactivities', 'helpfulforstudying', 'educationalapps',
+                   'performanceimpact', 'usagedistraction', 'attentionspan',
+                   'usefulfeatures', 'healthrisks', 'beneficialsubject',
+                   'usagesymptoms', 'symptomfrequency', 'healthprecautions', 'healthrating']
+ORDERED_CATEGORIES = {
+    "age": AGE_CATEGORIES,
+    "dailyusages": DAILY_USAGE_CATEGORIES,
+    "mobilephoneuseforeducation": FREQUENCY_CATEGORIES,
+    "symptomfrequency": FREQUENCY_CATEGORIES,
+    "performanceimpact": ['Stronglydisagree', 'Disagree', 'Neutral', 'Agree', 'Stronglyagree'],
+}
+
+# Cache do processo: caminho absoluto -> PreparedData da versão atual do arquivo
+_cache = {}
+_lock = threading.Lock()
+
+# Caminhos acompanhados por um watcher (recarga.py): a troca de versão é feita
+# em segundo plano, então get_prepared não confere o arquivo a cada chamada
+_watched = set()
+
+
+# Versão do arquivo identificada pelo par (mtime, tamanho)
+def file_key(file_path):
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class ReadOnlyFrameError(TypeError):
+    pass
+
+
+def _read_only(*args, **kwargs):
+    raise ReadOnlyFrameError(
+        "O dataset compartilhado é somente leitura; use df.assign(...) ou "
+        "adicione a coluna em add_derived_features"
+    )
+
+
+class _ReadOnlyIndexer:
+    def __init__(self, indexer):
+        self._indexer = indexer
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    __setitem__ = _read_only
+
+
+class _ReadOnlyDict(dict):
+    __setitem__ = _read_only
+    __delitem__ = _read_only
+    clear = _read_only
+    pop = _read_only
+    popitem = _read_only
+    setdefault = _read_only
+    update = _read_only
+
+    # Frames derivados copiam os attrs com deepcopy e recebem um dict comum
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+
+def _no_inplace(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if kwargs.get("inplace"):
+            _read_only()
+        return method(*args, **kwargs)
+
+    return wrapper
+
+
+# O pandas consulta `_no_setting_name` antes de trocar o name de um índice
+# (é o que protege os níveis de um MultiIndex); no índice e nas colunas do
+# frame compartilhado a consulta levanta ReadOnlyFrameError
+class _NameGuard:
+    def __bool__(self):
+        _read_only()
+
+
+# Índice e colunas próprios do frame compartilhado (visões, sem copiar os
+# rótulos): name, set_names/rename com inplace levantam ReadOnlyFrameError.
+# Subclasses de Index não servem, o pandas compara `type(index) is Index`.
+# Cópias e fatias do índice são objetos novos, sem a proteção.
+def _frozen_axis(index):
+    axis = index._view()
+    axis._no_setting_name = _NameGuard()
+    axis.set_names = _no_inplace(axis.set_names)
+    axis.rename = _no_inplace(axis.rename)
+    return axis
+
+
+# Atributos públicos existentes (index, name, attrs, colunas acessadas como
+# atributo) não podem ser trocados; os privados são do próprio pandas
+class _Frozen:
+    def __setattr__(self, name, value):
+        if self.__dict__.get("_frozen") and not name.startswith("_") and hasattr(self, name):
+            _read_only()
+        super().__setattr__(name, value)
+
+    @property
+    def attrs(self):
+        attrs = pd.core.generic.NDFrame.attrs.fget(self)
+        return _ReadOnlyDict(attrs) if self.__dict__.get("_frozen") else attrs
+
+    @attrs.setter
+    def attrs(self, value):
+        pd.core.generic.NDFrame.attrs.fset(self, value)
+
+    __setitem__ = _read_only
+    __delitem__ = _read_only
+    pop = _read_only
+    update = _read_only
+    _set_value = _read_only
+    _update_inplace = _read_only
+
+    @property
+    def loc(self):
+        return _ReadOnlyIndexer(super().loc)
+
+    @property
+    def iloc(self):
+        return _ReadOnlyIndexer(super().iloc)
+
+    @property
+    def at(self):
+        return _ReadOnlyIndexer(super().at)
+
+    @property
+    def iat(self):
+        return _ReadOnlyIndexer(super().iat)
+
+
+# Coluna do frame compartilhado (df["col"], df.col): escrever nela, mesmo por
+# atribuição encadeada (df["col"].iloc[0] = x), levanta ReadOnlyFrameError em
+# vez de alterar uma cópia em silêncio
+class FrozenSeries(_Frozen, pd.Series):
+    @property
+    def _constructor(self):
+        return pd.Series
+
+
+# Frame compartilhado entre sessões: qualquer escrita levanta ReadOnlyFrameError.
+# Operações que retornam um novo frame (assign, filtros, groupby) devolvem um
+# DataFrame comum, então só a mutação in-place é bloqueada; com o copy-on-write
+# do pandas 3, escrever nesses frames nunca altera o compartilhado.
+class FrozenDataFrame(_Frozen, pd.DataFrame):
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    def _box_col_values(self, values, loc):
+        column = super()._box_col_values(values, loc)
+        if self.__dict__.get("_frozen"):
+            column.__class__ = FrozenSeries
+            column.__dict__["_frozen"] = True
+        return column
+
+    def set_axis(self, labels, *, axis=0, copy=None):
+        if copy is False:
+            _read_only()
+        return pd.DataFrame.set_axis(self, labels, axis=axis)
+
+    isetitem = _read_only
+    insert = _read_only
+
+
+for _cls, _base in ((FrozenDataFrame, pd.DataFrame), (FrozenSeries, pd.Series)):
+    for _name in ("fillna", "replace", "drop", "dropna", "rename", "set_index", "reset_index",
+                  "sort_values", "sort_index", "clip", "where", "mask", "interpolate",
+                  "drop_duplicates", "eval", "query", "ffill", "bfill", "rename_axis"):
+        if hasattr(_base, _name):
+            setattr(_cls, _name, _no_inplace(getattr(_base, _name)))
+
+
+def freeze(df):
+    frozen = FrozenDataFrame(df, copy=False)
+    frozen.index = _frozen_axis(frozen.index)
+    frozen.columns = _frozen_axis(frozen.columns)
+    frozen.__dict__["_frozen"] = True
+    return frozen
+
+
+def normalize_name(col):
+    return col.strip().replace(" ", "").replace("_", "").lower()
+
+
+def normalize_columns(df):
+    df.columns = [normalize_name(col) for col in df.columns]
+    return df
+
+
+# Recodifica um categórico para as categorias ordinais do esquema. A tradução é
+# feita nas categorias e aplicada aos códigos, sem percorrer as linhas. Rótulos
+# fora do esquema viram ausentes (e depois são imputados), então são avisados.
+def _to_ordered(series, categories):
+    labels = series.cat.categories.astype(str).str.replace(" ", "", regex=False)
+    lookup = np.append(pd.Index(categories).get_indexer(labels), -1)
+    unknown = np.flatnonzero(lookup[:-1] == -1)
+    if len(unknown):
+        counts = np.bincount(series.cat.codes.to_numpy() + 1, minlength=len(labels) + 1)[1:]
+        found = ", ".join(f"{series.cat.categories[i]!r} ({counts[i]})" for i in unknown if counts[i])
+        if found:
+            logging.warning(f"Coluna {series.name}: respostas fora do esquema tratadas como ausentes: {found}")
+    return pd.Series(
+        pd.Categorical.from_codes(lookup[series.cat.codes.to_numpy()], categories=categories, ordered=True),
+        index=series.index, name=series.name,
+    )
+
+
+def apply_schema(df):
+    for col in df.columns:
+        if col in TEXT_COLUMNS:
+            continue
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+        if col in ORDERED_CATEGORIES:
+            df[col] = _to_ordered(df[col], ORDERED_CATEGORIES[col])
+    return df
+
+
+# Leitura colunar do questionário: categorias viram códigos inteiros já no parser
+def read_survey(file_path):
+    if file_path.endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(file_path, engine=EXCEL_ENGINE)
+    elif file_path.endswith('.csv'):
+        header = pd.read_csv(file_path, nrows=0).columns
+        dtype = {col: "category" for col in header if normalize_name(col) not in TEXT_COLUMNS}
+        df = pd.read_csv(file_path, dtype=dtype, engine=CSV_ENGINE)
+    elif file_path.endswith('.parquet'):
+        df = pd.read_parquet(file_path)
+    else:
+        raise ValueError("Formato de arquivo não suportado")
+    return apply_schema(normalize_columns(df))
+
+
+def drop_excluded(df):
+    if 'names' in df.columns:
+        df = df[~df['names'].isin(EXCLUDED_NAMES)].reset_index(drop=True)
+    return df
+
+
+# Limpeza única usada pelo pipeline em lote e pelos dashboards. No modo em
+# blocos as modas vêm do arquivo inteiro (`modes`), não do bloco.
+def clean_survey(df, modes=None):
+    df = drop_excluded(apply_schema(normalize_columns(df)))
+
+    for col in IMPUTED_COLUMNS:
+        if col in df.columns and df[col].isna().any():
+            fill = df[col].mode()[0] if modes is None else modes.get(col)
+            if fill is None:
+                continue
+            if fill not in df[col].cat.categories:
+                df[col] = df[col].cat.add_categories([fill])
+            df[col] = df[col].fillna(fill)
+
+    return df
+
+
+# Preparação completa de uma versão do arquivo: leitura, limpeza, codificação
+# dos campos multivalorados e colunas derivadas
+def prepare(file_path=DATA_PATH):
+    df = clean_survey(read_survey(file_path))
+    indicators = encode_multilabels(df)
+    return add_derived_features(df, indicators), indicators
+
+
+# Snapshot binário (Arrow IPC/Feather, sem compressão para permitir memory map)
+# do dataset preparado: categorias ficam com dicionário e cada campo multivalorado
+# vira colunas uint8 "<coluna>::<resposta>" da matriz indicadora.
+def snapshot_path(file_path=DATA_PATH):
+    return os.path.splitext(os.path.abspath(file_path))[0] + SNAPSHOT_SUFFIX
+
+
+def write_snapshot(df, indicators, file_path=DATA_PATH, output_path=None):
+    if not HAS_PYARROW:
+        logging.warning("pyarrow não instalado: snapshot não gerado")
+        return None
+    import pyarrow as pa
+    from pyarrow import feather
+    output_path = output_path or snapshot_path(file_path)
+
+    table = pa.Table.from_pandas(pd.DataFrame(df), preserve_index=False)
+    for col, multilabel in indicators.items():
+        for i, label in enumerate(multilabel.vocabulary):
+            table = table.append_column(f"{col}::{label}", pa.array(multilabel.matrix[:, i]))
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "source_key": list(file_key(file_path)),
+        "indicators": {col: ml.vocabulary for col, ml in indicators.items()},
+    }
+    table = table.replace_schema_metadata({**table.schema.metadata, b"saudecelular": json.dumps(meta)})
+
+    # Escrita atômica: workers lendo o snapshot nunca veem um arquivo pela metade
+    tmp_path = output_path + ".tmp"
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, output_path)
+    logging.info(f"Snapshot salvo em {output_path}")
+    return output_path
+
+
+# Lê o snapshot com memory map. Retorna None se não existir, se for de outra
+# versão da preparação ou se o arquivo de origem mudou desde que foi gerado.
+def read_snapshot(path, source_key=None):
+    if not HAS_PYARROW or not os.path.exists(path):
+        return None
+    from pyarrow import feather
+
+    table = feather.read_table(path, memory_map=True)
+    meta = json.loads((table.schema.metadata or {}).get(b"saudecelular", b"{}"))
+    if meta.get("version") != SNAPSHOT_VERSION:
+        return None
+    if source_key is not None and tuple(meta.get("source_key", ())) != tuple(source_key):
+        return None
+
+    indicators = {}
+    for col, vocabulary in meta["indicators"].items():
+        names = [f"{col}::{label}" for label in vocabulary]
+        matrix = np.column_stack([table.column(name).to_numpy() for name in names]).astype(np.uint8, copy=False)
+        indicators[col] = MultiLabel(vocabulary, matrix.reshape(table.num_rows, len(vocabulary)))
+        table = table.drop_columns(names)
+    return table.to_pandas(), indicators
+
+
+# Carrega a versão atual: o snapshot quando ele corresponde ao arquivo de origem
+# (ou quando só o snapshot foi distribuído), senão a preparação completa
+def _load(path):
+    snapshot = snapshot_path(path)
+    if os.path.exists(path):
+        key = file_key(path)
+        loaded = read_snapshot(snapshot, key)
+    else:
+        key = ("snapshot",) + file_key(snapshot)
+        loaded = read_snapshot(snapshot)
+        if loaded is None:
+            raise FileNotFoundError(path)
+
+    if loaded is None:
+        return key, prepare(path), "csv"
+    logging.info(f"Dataset carregado do snapshot {snapshot}")
+    return key, loaded, "snapshot"
+
+
+# Entrada do cache: o frame congelado de uma versão do arquivo e os artefatos
+# derivados dele (cubo de agregados etc.), memoizados junto com a versão
+class PreparedData:
+    def __init__(self, version, df, indicators, source="csv"):
+        self.version = version
+        self.source = source
+        self.df = df
+        self.indicators = indicators
+        self._artifacts = {}
+        self._lock = threading.Lock()
+
+    def artifact(self, name, build):
+        value = self._artifacts.get(name)
+        if value is None:
+            with self._lock:
+                value = self._artifacts.get(name)
+                if value is None:
+                    value = build(self)
+                    self._artifacts[name] = value
+        return value
+
+
+# Versão da fonte de dados: o arquivo original ou, na falta dele, o snapshot
+def source_key(path):
+    return file_key(path) if os.path.exists(path) else ("snapshot",) + file_key(snapshot_path(path))
+
+
+def load_prepared(path):
+    with metrics.timer("data_load_seconds"):
+        key, (df, indicators), source = _load(path)
+    metrics.set("data_rows", len(df))
+    return PreparedData(key, freeze(df), indicators, source)
+
+
+# A preparação roda uma vez por processo e só é refeita quando o mtime ou o
+# tamanho do arquivo mudam. Todas as sessões recebem o mesmo frame congelado.
+def get_prepared(file_path=DATA_PATH):
+    path = os.path.abspath(file_path)
+    entry = _cache.get(path)
+    if entry is not None and path in _watched:
+        return entry
+    key = source_key(path)
+
+    if entry is None or entry.version != key:
+        with _lock:
+            entry = _cache.get(path)
+            if entry is None or entry.version != key:
+                entry = load_prepared(path)
+                _cache[path] = entry
+                logging.info(f"Dataset preparado: {len(entry.df)} linhas ({path})")
+
+    return entry
+
+
+# Publica uma versão já preparada (e com os artefatos aquecidos): a troca é uma
+# atribuição sob o lock, e quem ainda usa a versão anterior a mantém até soltar
+def publish_prepared(path, entry):
+    with _lock:
+        previous = _cache.get(path)
+        _cache[path] = entry
+    return previous
+
+
+def get_dataset(file_path=DATA_PATH):
+    return get_prepared(file_path).df
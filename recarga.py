@@ -0,0 +1,107 @@
+import os
+import logging
+import threading
+
+import preparacao
+from metricas import metrics
+from preparacao import DATA_PATH
+
+# Recarga do dataset sem reiniciar os workers do Shiny. Uma thread em segundo
+# plano confere a versão do arquivo (mtime, tamanho); quando ela muda e se
+# estabiliza, a nova versão é preparada e seus artefatos (cubo etc.) são
+# aquecidos fora do event loop, e só então a entrada do cache é trocada. Os
+# callbacks `on_swap` avisam o app (o dashboard entrega a versão ao event loop),
+# e as sessões re-renderizam uma vez.
+
+# Intervalo entre verificações do arquivo, em segundos
+POLL_INTERVAL = 2.0
+
+
+class DataWatcher:
+    # `warm`: funções chamadas com a nova PreparedData antes da troca;
+    # `on_swap`: chamadas com a nova versão depois dela
+    def __init__(self, file_path=DATA_PATH, interval=POLL_INTERVAL, warm=(), on_swap=()):
+        self.path = os.path.abspath(file_path)
+        self.interval = interval
+        self.warm = list(warm)
+        self.on_swap = list(on_swap)
+        self.version = None
+        self.reloads = 0
+        self._pending = None
+        self._failed = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # Idempotente: pode ser chamado a cada nova sessão, só a primeira inicia a thread
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self._stop.clear()
+            preparacao._watched.add(self.path)
+            self._thread = threading.Thread(target=self._run, name="recarga-dados", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            self._stop.set()
+            preparacao._watched.discard(self.path)
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        # Carga inicial também fora do event loop; get_prepared compartilha o
+        # lock, então uma sessão que chegue antes espera a mesma carga
+        try:
+            entry = preparacao.get_prepared(self.path)
+            for warm in self.warm:
+                warm(entry)
+            self._publish(entry)
+        except Exception as e:
+            logging.error(f"Erro ao carregar {self.path}: {e}")
+
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    # Uma verificação: só recarrega quando a nova versão se repete em duas
+    # leituras seguidas, para não ler um arquivo ainda sendo gravado
+    def check(self):
+        try:
+            key = preparacao.source_key(self.path)
+        except OSError:
+            return False
+        if key == self.version or key == self._failed:
+            self._pending = None
+            return False
+        if key != self._pending:
+            self._pending = key
+            return False
+        self._pending = None
+        return self.reload(key)
+
+    def reload(self, key=None):
+        try:
+            entry = preparacao.load_prepared(self.path)
+            for warm in self.warm:
+                warm(entry)
+        except Exception as e:
+            self._failed = key
+            metrics.inc("data_reload_failures_total")
+            logging.error(f"Erro ao recarregar {self.path}, mantendo a versão anterior: {e}")
+            return False
+
+        preparacao.publish_prepared(self.path, entry)
+        self._publish(entry)
+        self.reloads += 1
+        metrics.inc("data_reloads_total")
+        logging.info(f"Dataset recarregado: {len(entry.df)} linhas ({self.path})")
+        return True
+
+    def _publish(self, entry):
+        self._failed = None
+        self.version = entry.version
+        for callback in self.on_swap:
+            callback(entry.version)
@@ -1,24 +1,24 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import os
+import argparse
+import json
+import sys
+import time
 import logging
+from contextlib import contextmanager
+
+from blocos import DEFAULT_CHUNKSIZE, process_chunks
+from correlacao import METHODS, SCORE_LEVELS, CorrelationStats, ordinal_scores
+from graficos_lote import distribution_job, heatmap_job, render_plots
+from ingestao import ingest_files, is_multi_input
+from metricas import metrics
+from perfil import profiler
+from preparacao import add_derived_features, clean_survey, get_prepared, read_survey, write_snapshot
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-plt.style.use('ggplot')
-sns.set_palette('Set2')
-
 def load_data(file_path):
     try:
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path)
-        elif file_path.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(file_path)
-        else:
-            raise ValueError("Formato de arquivo não suportado")
+        df = read_survey(file_path)
         logging.info(f"Dados carregados com sucesso: {df.shape[0]} linhas e {df.shape[1]} colunas")
         logging.info(f"Colunas disponíveis: {df.columns.tolist()}")
         return df
@@ -28,119 +28,65 @@ def load_data(file_path):
 
 def clean_data(df):
     logging.info("Iniciando limpeza de dados...")
-    df_clean = df.copy()
-    df_clean.columns = [col.strip().replace('_', '').replace(' ', '').lower() for col in df_clean.columns]
-
-    if 'names' in df_clean.columns:
-        df_clean = df_clean[df_clean['names'] != 'Mehvish']
-
-    cat_cols = ['gender', 'mobileoperatingsystem', 'mobilephoneuseforeducation', 
-                'mobilephoneactivities', 'helpfulforstudying', 'educationalapps',
-                'performanceimpact', 'usagedistraction', 'attentionspan',
-                'usefulfeatures', 'healthrisks', 'beneficialsubject',
-                'usagesymptoms', 'symptomfrequency', 'healthprecautions', 'healthrating']
-    
-    for col in cat_cols:
-        if col in df_clean.columns:
-            df_clean.loc[:, col] = df_clean[col].fillna(df_clean[col].mode()[0])
-
-    if 'age' in df_clean.columns:
-        df_clean['age'] = pd.Categorical(df_clean['age'], categories=['16-20', '21-25', '26-30', '31-35'], ordered=True)
-
-    for col in ['mobilephoneactivities', 'usagesymptoms', 'healthrating']:
-        if col in df_clean.columns and df_clean[col].dtype == 'object':
-            df_clean.loc[:, col] = df_clean[col].str.split(';')
-
-    if 'dailyusages' in df_clean.columns:
-        df_clean['dailyusages'] = pd.Categorical(df_clean['dailyusages'], categories=['<2hours', '2-4hours', '4-6hours', '>6hours'], ordered=True)
-
+    df_clean = clean_survey(df.copy())
     logging.info(f"Limpeza concluída. Dimensões finais: {df_clean.shape[0]} linhas e {df_clean.shape[1]} colunas")
     return df_clean
 
+# Distribuições registradas pela análise exploratória: (título, coluna)
+DISTRIBUTIONS = [
+    ("Distribuição por idade", 'age'),
+    ("Distribuição por gênero", 'gender'),
+    ("Sistema operacional", 'mobileoperatingsystem'),
+    ("Tempo de uso diário", 'dailyusages'),
+    ("Atividades", 'simplified_activities'),
+    ("Uso para educação", 'mobilephoneuseforeducation'),
+    ("Apps educacionais", 'educationalapps'),
+    ("Utilidade nos estudos", 'helpfulforstudying'),
+    ("Impacto no desempenho", 'performanceimpact'),
+    ("Distrações", 'usagedistraction'),
+    ("Capacidade de atenção", 'attentionspan'),
+    ("Sintomas", 'simplified_symptoms'),
+    ("Frequência dos sintomas", 'symptomfrequency'),
+    ("Precauções de saúde", 'healthprecautions'),
+    ("Autoavaliação de saúde", 'simplified_health'),
+    ("Recursos úteis", 'usefulfeatures'),
+    ("Riscos percebidos", 'healthrisks'),
+    ("Áreas beneficiadas", 'beneficialsubject'),
+]
+
+# Cada etapa alimenta as métricas e, com --profile, o perfilador
+@contextmanager
+def stage(name):
+    with metrics.timer("stage_seconds", stage=name), profiler.stage(name):
+        yield
+
+def show(title, counts):
+    dist = counts / counts.sum() * 100
+    logging.info(f"\n{title}\n{(dist.round(1).astype(str) + '%').to_string()}")
+
 def exploratory_analysis(df):
     logging.info("Iniciando análise exploratória...")
 
-    def simplify_multiple(value):
-        if isinstance(value, list):
-            if 'All of these' in value:
-                return 'All of these'
-            elif len(value) > 1:
-                return 'Multiple'
-            elif len(value) == 1:
-                return value[0]
-        elif isinstance(value, str):
-            if 'All of these' in value:
-                return 'All of these'
-            elif ';' in value:
-                return 'Multiple'
-            return value
-        return 'Not specified'
-
-    def simplify_rating(value):
-        if isinstance(value, list):
-            return value[0]
-        elif isinstance(value, str) and ';' in value:
-            return value.split(';')[0]
-        return value
-
-    df['simplified_activities'] = df['mobilephoneactivities'].apply(simplify_multiple)
-    df['simplified_symptoms'] = df['usagesymptoms'].apply(simplify_multiple)
-    df['simplified_health'] = df['healthrating'].apply(simplify_rating)
-
-    def show(title, series):
-        dist = series.value_counts(normalize=True) * 100
-        logging.info(f"\n{title}\n{(dist.round(1).astype(str) + '%').to_string()}")
-
-    show("Distribuição por idade", df['age'])
-    show("Distribuição por gênero", df['gender'])
-    show("Sistema operacional", df['mobileoperatingsystem'])
-    show("Tempo de uso diário", df['dailyusages'])
-    show("Atividades", df['simplified_activities'])
-    show("Uso para educação", df['mobilephoneuseforeducation'])
-    show("Apps educacionais", df['educationalapps'])
-    show("Utilidade nos estudos", df['helpfulforstudying'])
-    show("Impacto no desempenho", df['performanceimpact'])
-    show("Distrações", df['usagedistraction'])
-    show("Capacidade de atenção", df['attentionspan'])
-    show("Sintomas", df['simplified_symptoms'])
-    show("Frequência dos sintomas", df['symptomfrequency'])
-    show("Precauções de saúde", df['healthprecautions'])
-    show("Autoavaliação de saúde", df['simplified_health'])
-    show("Recursos úteis", df['usefulfeatures'])
-    show("Riscos percebidos", df['healthrisks'])
-    show("Áreas beneficiadas", df['beneficialsubject'])
+    # O dataset preparado já traz as colunas simplificadas
+    if 'simplified_activities' not in df.columns:
+        df = add_derived_features(df)
+
+    for title, col in DISTRIBUTIONS:
+        with profiler.step(col):
+            show(title, df[col].value_counts())
 
     logging.info("Análise exploratória concluída.")
     return df
 
-def correlation_analysis(df):
+def correlation_analysis(df, method="pearson"):
     logging.info("Iniciando análise de correlação...")
+    stats = CorrelationStats.from_frame(ordinal_scores(df), SCORE_LEVELS)
+    corr = stats.matrix(method)
+    report_correlation(corr)
+    return corr
 
-    maps = {
-        'mobilephoneuseforeducation': {'Frequently': 4, 'Sometimes': 3, 'Rarely': 2, 'Never': 1},
-        'dailyusages': {'<2hours': 1, '2-4hours': 2, '4-6hours': 3, '>6hours': 4},
-        'performanceimpact': {'Stronglyagree': 5, 'Agree': 4, 'Neutral': 3, 'Disagree': 2, 'Stronglydisagree': 1},
-        'symptomfrequency': {'Frequently': 4, 'Sometimes': 3, 'Rarely': 2, 'Never': 1},
-        'simplified_health': {'Excellent': 4, 'Good': 3, 'Fair': 2, 'Poor': 1}
-    }
-
-    for col, mapping in maps.items():
-        if col in df.columns:
-            df[col + '_num'] = df[col].map(mapping)
-
-    numeric = [col for col in df.columns if col.endswith('_num')]
-    corr = df[numeric].corr()
-
-    os.makedirs('plots', exist_ok=True)
-    plt.figure(figsize=(10, 8))
-    sns.heatmap(corr, annot=True, cmap='coolwarm', center=0)
-    plt.title('Matriz de Correlação')
-    plt.tight_layout()
-    plt.savefig('plots/correlacao_uso_celular.png', dpi=300)
-    plt.close()
-
-    logging.info("Matriz de correlação salva em plots/correlacao_uso_celular.png")
-
+# Pares mais fortes de uma matriz de correlação já calculada
+def report_correlation(corr):
     unstacked = corr.unstack()
     unstacked = unstacked[unstacked < 1.0]
     top_pos = unstacked.nlargest(3)
@@ -154,19 +100,154 @@ def correlation_analysis(df):
     for (a, b), val in top_neg.items():
         logging.info(f"{a} e {b}: {val:.2f} → quando uma aumenta, a outra tende a diminuir.")
 
-def main():
-    file_path = "saudevscelular.csv"
-    df = load_data(file_path)
+# Estágio de gráficos: um PNG por distribuição e o heatmap da correlação,
+# renderizados em paralelo e só quando os agregados mudaram
+def batch_plots(distributions, corr, method="pearson", workers=None):
+    jobs = [distribution_job(title, col, distributions[col]) for title, col in DISTRIBUTIONS]
+    title = 'Matriz de Correlação' if method == "pearson" else f'Matriz de Correlação ({method})'
+    jobs.append(heatmap_job(title, corr))
+    try:
+        rendered = render_plots(jobs, workers)
+    except Exception as e:
+        logging.error(f"Erro ao renderizar gráficos: {e}")
+        return
+    if 'correlacao_uso_celular.png' in rendered:
+        logging.info("Matriz de correlação salva em plots/correlacao_uso_celular.png")
+
+# Modo em blocos: memória limitada ao tamanho do bloco. As distribuições e a
+# correlação saem dos acumuladores e o arquivo limpo é gravado bloco a bloco.
+def streaming_analysis(file_path, chunksize, output_path="dados_uso_celular_limpos.csv", method="pearson", workers=None):
+    logging.info(f"Processando {file_path} em blocos de {chunksize} linhas...")
+    try:
+        with stage("blocos"):
+            rows, counts, correlation = process_chunks(
+                file_path, output_path, [col for _, col in DISTRIBUTIONS], ordinal_scores, chunksize,
+                levels=SCORE_LEVELS,
+            )
+    except Exception as e:
+        logging.error(f"Erro ao processar dados em blocos: {e}")
+        return
+    report_aggregates(rows, counts, correlation, output_path, method, workers)
+
+# Vários arquivos (diretório ou glob) limpos em paralelo, um por processo
+def parallel_analysis(pattern, workers=None, chunksize=None, output_path="dados_uso_celular_limpos.csv", method="pearson"):
+    try:
+        with stage("ingestao"):
+            rows, counts, correlation, files = ingest_files(
+                pattern, output_path, [col for _, col in DISTRIBUTIONS], ordinal_scores, SCORE_LEVELS,
+                workers=workers, chunksize=chunksize or DEFAULT_CHUNKSIZE,
+            )
+    except Exception as e:
+        logging.error(f"Erro ao ingerir arquivos: {e}")
+        return
+    for summary in files:
+        metrics.set("ingest_file_rows", summary["linhas"], file=summary["arquivo"])
+        metrics.set("ingest_file_seconds", summary["segundos"], file=summary["arquivo"])
+        if summary["linhas_por_segundo"] is not None:
+            metrics.set("ingest_file_rows_per_second", summary["linhas_por_segundo"], file=summary["arquivo"])
+            metrics.set("ingest_file_megabytes_per_second", summary["mb_por_segundo"], file=summary["arquivo"])
+    report_aggregates(rows, counts, correlation, output_path, method, workers)
+
+# Distribuições e correlação a partir dos acumuladores dos modos em blocos e paralelo
+def report_aggregates(rows, counts, correlation, output_path, method="pearson", workers=None):
+    if not rows:
+        logging.error("Nenhuma linha encontrada no arquivo")
+        return
+    logging.info(f"Dados limpos salvos em {output_path} ({rows} linhas)")
+    metrics.set("data_rows", rows)
+
+    with stage("exploratoria"):
+        logging.info("Iniciando análise exploratória...")
+        for title, col in DISTRIBUTIONS:
+            with profiler.step(col):
+                show(title, counts.series(col))
+        logging.info("Análise exploratória concluída.")
+
+    with stage("correlacao"):
+        logging.info("Iniciando análise de correlação...")
+        corr = correlation.matrix(method)
+        report_correlation(corr)
+    with stage("graficos"):
+        batch_plots({col: counts.series(col) for _, col in DISTRIBUTIONS}, corr, method, workers)
+    logging.info("Análise finalizada com sucesso.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Análise do uso de celulares na saúde e educação")
+    parser.add_argument("arquivo", nargs="?", default="saudevscelular.csv",
+                        help="CSV, Excel ou Parquet do questionário, ou diretório/glob com vários arquivos")
+    parser.add_argument("--chunksize", type=int, help="processa o arquivo em blocos com este número de linhas")
+    parser.add_argument("--workers", type=int, help="processos usados com vários arquivos e nos gráficos (padrão: núcleos da CPU)")
+    parser.add_argument("--correlacao", choices=METHODS, default="pearson",
+                        help="coeficiente da matriz de correlação (spearman/kendall respeitam a escala ordinal)")
+    parser.add_argument("--metricas", help="grava um resumo em JSON das etapas (tempo, linhas, memória); '-' para stdout")
+    parser.add_argument("--profile", nargs="?", const="perfil", metavar="DIR",
+                        help="perfila cada etapa (cProfile, tracemalloc, pilhas para flamegraph) e grava em DIR (padrão: perfil)")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        profiler.start()
+    start = time.perf_counter()
+    try:
+        analyze(args)
+    finally:
+        if args.profile:
+            profiler.stop()
+            logging.info(profiler.report())
+            profiler.save(args.profile)
+        if args.metricas:
+            write_metrics(args, time.perf_counter() - start)
+
+# Resumo estruturado da execução, a partir do registro de metricas.py
+def write_metrics(args, seconds):
+    summary = {
+        "arquivo": args.arquivo,
+        "modo": "paralelo" if is_multi_input(args.arquivo) else "blocos" if args.chunksize else "memoria",
+        "segundos": round(seconds, 3),
+        "metricas": metrics.summary(),
+    }
+    text = json.dumps(summary, indent=2, ensure_ascii=False, default=str)
+    if args.metricas == "-":
+        print(text, file=sys.stdout)
+        return
+    with open(args.metricas, "w", encoding="utf-8") as f:
+        f.write(text)
+    logging.info(f"Métricas da execução salvas em {args.metricas}")
 
-    if df is not None:
-        df_clean = clean_data(df)
+def analyze(args):
+    file_path = args.arquivo
+
+    if is_multi_input(file_path):
+        parallel_analysis(file_path, args.workers, args.chunksize, method=args.correlacao)
+        return
+
+    if args.chunksize:
+        streaming_analysis(file_path, args.chunksize, method=args.correlacao, workers=args.workers)
+        return
+
+    try:
+        with stage("preparacao"):
+            prepared = get_prepared(file_path)
+    except Exception as e:
+        logging.error(f"Erro ao carregar dados: {e}")
+        return
+
+    df_clean = prepared.df
+    logging.info(f"Dados preparados ({prepared.source}): {df_clean.shape[0]} linhas e {df_clean.shape[1]} colunas")
+    with stage("exploratoria"):
         df_analyzed = exploratory_analysis(df_clean)
-        correlation_analysis(df_analyzed)
+    with stage("correlacao"):
+        corr = correlation_analysis(df_analyzed, args.correlacao)
+    with stage("graficos"):
+        batch_plots({col: df_analyzed[col].value_counts() for _, col in DISTRIBUTIONS}, corr, args.correlacao, args.workers)
 
-        os.makedirs('plots', exist_ok=True)
+    with stage("gravacao"):
         df_clean.to_csv("dados_uso_celular_limpos.csv", index=False)
         logging.info("Dados limpos salvos em dados_uso_celular_limpos.csv")
-        logging.info("Análise finalizada com sucesso.")
+
+        # Snapshot binário lido pelos dashboards na inicialização
+        if prepared.source != "snapshot":
+            write_snapshot(df_clean, prepared.indicators, file_path=file_path)
+    logging.info("Análise finalizada com sucesso.")
 
 if __name__ == "__main__":
     main()
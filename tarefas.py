@@ -0,0 +1,36 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from metricas import metrics
+
+# Trabalho pesado dos apps (recortes do cubo e construção de figuras)
+# fora do event loop do Shiny, num pool de threads limitado. Pedidos iguais
+# feitos ao mesmo tempo por sessões diferentes compartilham uma execução.
+
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="figuras")
+
+# Chave -> future da execução em andamento
+_inflight = {}
+
+
+# Executa func(*args) no pool; uma sessão que peça a mesma chave enquanto a
+# execução não terminou aguarda o mesmo resultado. O shield impede que uma
+# sessão encerrada cancele a espera das outras.
+async def run_shared(key, func, *args):
+    future = _inflight.get(key)
+    if future is not None:
+        metrics.inc("coalesced_requests_total")
+    else:
+        future = asyncio.get_running_loop().run_in_executor(executor, partial(func, *args))
+        _inflight[key] = future
+        future.add_done_callback(lambda done: _inflight.pop(key) if _inflight.get(key) is done else None)
+    return await asyncio.shield(future)
+
+
+@metrics.collector
+def _inflight_metrics(registry):
+    registry.set("inflight_tasks", len(_inflight))
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from blocos import ChunkProcessor, _replace_ranges, iter_chunks, process_chunks
+from correlacao import SCORE_LEVELS, ordinal_scores
+from preparacao import prepare
+
+DATA_PATH = Path(__file__).resolve().parent.parent / "saudevscelular.csv"
+COLUMNS = ["gender", "dailyusages", "symptomfrequency", "simplified_health"]
+
+
+# Respostas ordenadas com a categoria minoritária de gênero primeiro e um gênero
+# ausente no primeiro bloco: a moda parcial ("Female") difere da final ("Male")
+@pytest.fixture
+def flip_csv(tmp_path):
+    df = pd.read_csv(DATA_PATH)
+    df = df.sort_values("Gender ", kind="stable").reset_index(drop=True)
+    df.loc[1, "Gender "] = None
+    path = str(tmp_path / "ordenado.csv")
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_mode_flip_matches_in_memory_cleaning(flip_csv, tmp_path):
+    output = str(tmp_path / "limpo.csv")
+    processor = ChunkProcessor(output, COLUMNS, ordinal_scores, SCORE_LEVELS, flip_csv, chunksize=10)
+    for chunk in iter_chunks(flip_csv, 10):
+        processor.feed(chunk)
+    assert processor.pending[0]["modas"]["gender"] == "Female"
+
+    _, changed = processor.finish()
+    expected = prepare(flip_csv)[0]
+    assert "gender" in changed
+    assert Path(output).read_bytes() == expected.to_csv(index=False).encode("utf-8")
+    assert processor.rows == len(expected)
+    for col in COLUMNS:
+        assert processor.counts.series(col).to_dict() == expected[col].value_counts().to_dict()
+
+
+@pytest.mark.parametrize("chunksize", [7, 10, 1000])
+def test_process_chunks_matches_in_memory_cleaning(flip_csv, tmp_path, chunksize):
+    output = str(tmp_path / "limpo.csv")
+    rows, counts, correlation = process_chunks(flip_csv, output, COLUMNS, ordinal_scores, chunksize,
+                                               levels=SCORE_LEVELS)
+    expected = prepare(flip_csv)[0]
+    assert Path(output).read_bytes() == expected.to_csv(index=False).encode("utf-8")
+    assert rows == len(expected)
+    pd.testing.assert_frame_equal(correlation.matrix("pearson"), ordinal_scores(expected).corr(), atol=1e-12)
+
+
+def test_replace_ranges_splices_bytes_of_other_lengths(tmp_path):
+    path = tmp_path / "saida.csv"
+    path.write_bytes(b"cabecalho\naaa\nbbbb\ncc\n")
+    size = _replace_ranges(str(path), [(10, 14, b"x\n"), (19, 22, b"zzzzzz\n")], buffer=3)
+    assert path.read_bytes() == b"cabecalho\nx\nbbbb\nzzzzzz\n"
+    assert size == len(path.read_bytes())
+    assert not (tmp_path / "saida.csv.tail").exists()
@@ -0,0 +1,62 @@
+from importlib.util import find_spec
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlacao import METHODS, SCORE_LEVELS, CorrelationStats
+
+COLUMNS = list(SCORE_LEVELS)
+
+
+# Kendall tau-b por força bruta, para quando o pandas não tem o scipy
+def _tau_b(x, y):
+    dx = np.sign(x[:, None] - x[None, :])
+    dy = np.sign(y[:, None] - y[None, :])
+    concordance = (dx * dy).sum() / 2
+    return concordance / np.sqrt((dx != 0).sum() / 2 * (dy != 0).sum() / 2)
+
+
+def _expected(frame, method):
+    if method == "kendall" and find_spec("scipy") is None:
+        return frame.corr(method=_tau_b)
+    return frame.corr(method=method)
+
+
+# Escores ordinais com ~20% de ausentes por coluna
+@pytest.fixture
+def scores():
+    rng = np.random.default_rng(42)
+    frame = pd.DataFrame({col: rng.choice(levels, size=500).astype(float) for col, levels in SCORE_LEVELS.items()})
+    return frame.mask(rng.random(frame.shape) < 0.2)
+
+
+def _merged(chunks):
+    stats = [CorrelationStats(COLUMNS, SCORE_LEVELS).update(chunk) for chunk in chunks]
+    total = stats[0]
+    for other in stats[1:]:
+        total.merge(other)
+    return total
+
+
+@pytest.mark.parametrize("method", METHODS)
+@pytest.mark.parametrize("bounds", [(0, 500), (0, 1, 2, 37, 300, 500), (0, 250, 499, 500)],
+                         ids=["inteiro", "desigual", "bloco_de_uma_linha"])
+def test_merged_chunks_match_pandas(scores, method, bounds):
+    chunks = [scores.iloc[a:b] for a, b in zip(bounds, bounds[1:])]
+    result = _merged(chunks).matrix(method)
+    pd.testing.assert_frame_equal(result, _expected(scores, method), atol=1e-12)
+
+
+# Um bloco em que uma coluna é toda ausente e outro inteiramente ausente
+@pytest.mark.parametrize("method", METHODS)
+def test_all_missing_chunks(scores, method):
+    scores.iloc[100:200, 0] = np.nan
+    scores.iloc[300:320] = np.nan
+    chunks = [scores.iloc[:100], scores.iloc[100:200], scores.iloc[200:300], scores.iloc[300:320], scores.iloc[320:]]
+    with np.errstate(all="raise"):
+        stats = CorrelationStats(COLUMNS, SCORE_LEVELS)
+        for chunk in chunks:
+            stats.update(chunk)
+    pd.testing.assert_frame_equal(stats.matrix(method), _expected(scores, method), atol=1e-12)
+    pd.testing.assert_frame_equal(_merged(chunks).matrix(method), _expected(scores, method), atol=1e-12)
@@ -0,0 +1,21 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from benchmark import IMPORTACOES, SCRIPT_IMPORTACAO
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+# Cada ponto de entrada num interpretador novo: nenhum módulo pesado da lista
+# de benchmark.py pode ser carregado só pela importação
+@pytest.mark.parametrize("module", IMPORTACOES)
+def test_entry_point_import_skips_heavy_modules(module):
+    script = SCRIPT_IMPORTACAO.format(module=module, proibidos=IMPORTACOES[module])
+    out = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_DIR,
+                         capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result["carregados"] == []
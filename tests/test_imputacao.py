@@ -0,0 +1,78 @@
+import random
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from imputacao import FrequencySketch, ModeImputer
+
+
+def _sketch(counts, max_exact, capacity):
+    sketch = FrequencySketch(max_exact, capacity)
+    sketch.update(counts)
+    return sketch
+
+
+def _parts(seed, labels, n=3):
+    rng = random.Random(seed)
+    # "a" é a moda com folga em todas as partes
+    return [Counter(rng.choice(labels) for _ in range(rng.randint(50, 200))) + Counter(a=120) for _ in range(n)]
+
+
+# Abaixo do limite de cardinalidade as contagens são exatas e a mesclagem é
+# associativa por completo
+@pytest.mark.parametrize("seed", range(20))
+def test_exact_merge_is_associative(seed):
+    a, b, c = (_sketch(part, 100, 10) for part in _parts(seed, "abcdefgh"))
+    a2, b2, c2 = (_sketch(part, 100, 10) for part in _parts(seed, "abcdefgh"))
+    left = a.merge(b).merge(c)
+    right = a2.merge(b2.merge(c2))
+    assert left.exact and right.exact
+    assert left.counts == right.counts
+    assert (left.total, left.error) == (right.total, right.error)
+
+
+# No modo Misra-Gries as reduções dependem da ordem das mesclagens, então os
+# contadores podem variar dentro do erro declarado; total, moda e a garantia
+# (cada contagem subestimada em no máximo `error`) não dependem do agrupamento
+@pytest.mark.parametrize("seed", range(20))
+def test_heavy_hitter_merge_is_associative_within_error(seed):
+    labels = [f"rotulo{i}" for i in range(60)]
+    parts = _parts(seed, labels)
+    truth = sum(parts, Counter())
+    groupings = [
+        _sketch(parts[0], 20, 5).merge(_sketch(parts[1], 20, 5)).merge(_sketch(parts[2], 20, 5)),
+        _sketch(parts[0], 20, 5).merge(_sketch(parts[1], 20, 5).merge(_sketch(parts[2], 20, 5))),
+        _sketch(parts[1], 20, 5).merge(_sketch(parts[2], 20, 5)).merge(_sketch(parts[0], 20, 5)),
+    ]
+    for sketch in groupings:
+        assert not sketch.exact
+        assert sketch.total == sum(truth.values())
+        assert sketch.mode() == "a"
+        assert sketch.error <= sketch.total / (sketch.capacity + 1)
+        for label, n in truth.items():
+            assert n - sketch.error <= sketch.counts.get(label, 0) <= n
+
+
+# Com muitos valores distintos a coluna cai no resumo de heavy hitters e a
+# moda verdadeira continua sendo a escolhida
+def test_fallback_keeps_true_mode():
+    rng = random.Random(7)
+    values = ["moda"] * 3_000 + ["segunda"] * 1_500 + [f"raro{i}" for i in range(20_000)]
+    rng.shuffle(values)
+    imputer = ModeImputer(["healthrisks"], max_exact=1_000, capacity=50)
+    for start in range(0, len(values), 2_500):
+        imputer.update(pd.DataFrame({"healthrisks": pd.Categorical(values[start:start + 2_500])}))
+
+    assert imputer.approximate_columns() == ["healthrisks"]
+    assert imputer.modes() == {"healthrisks": "moda"}
+
+
+def test_merged_imputers_match_single_pass():
+    df = pd.DataFrame({"gender": pd.Categorical(["Male", "Female", None, "Female", "Male", "Male"])})
+    whole = ModeImputer(["gender"])
+    whole.update(df)
+    first, second = ModeImputer(["gender"]), ModeImputer(["gender"])
+    first.update(df.iloc[:3])
+    second.update(df.iloc[3:])
+    assert first.merge(second).modes() == whole.modes() == {"gender": "Male"}
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from preparacao import ReadOnlyFrameError, freeze
+
+
+@pytest.fixture
+def frozen():
+    return freeze(pd.DataFrame({"gender": ["Male", "Female"], "symptom_count": [1, 2]}))
+
+
+MUTATIONS = {
+    "setitem": lambda df: df.__setitem__("symptom_count", 0),
+    "delitem": lambda df: df.__delitem__("gender"),
+    "columns": lambda df: setattr(df, "columns", ["GENDER", "SYMPTOM_COUNT"]),
+    "index": lambda df: setattr(df, "index", [10, 11]),
+    "attrs": lambda df: setattr(df, "attrs", {"versao": 2}),
+    "coluna_como_atributo": lambda df: setattr(df, "symptom_count", 0),
+    "isetitem": lambda df: df.isetitem(1, [0, 0]),
+    "insert": lambda df: df.insert(0, "nova", 1),
+    "pop": lambda df: df.pop("gender"),
+    "update": lambda df: df.update(pd.DataFrame({"symptom_count": [0, 0]})),
+    "set_axis_copy_false": lambda df: df.set_axis(["a", "b"], axis=1, copy=False),
+    "loc": lambda df: df.loc.__setitem__((0, "symptom_count"), 0),
+    "iloc": lambda df: df.iloc.__setitem__((0, 1), 0),
+    "at": lambda df: df.at.__setitem__((0, "symptom_count"), 0),
+    "iat": lambda df: df.iat.__setitem__((0, 1), 0),
+    "fillna_inplace": lambda df: df.fillna(0, inplace=True),
+    "index_name": lambda df: setattr(df.index, "name", "linha"),
+    "columns_name": lambda df: setattr(df.columns, "name", "campo"),
+    "index_set_names_inplace": lambda df: df.index.set_names("linha", inplace=True),
+    "columns_rename_inplace": lambda df: df.columns.rename("campo", inplace=True),
+    "rename_axis_inplace": lambda df: df.rename_axis("linha", inplace=True),
+    "attrs_item": lambda df: df.attrs.__setitem__("versao", 2),
+    "attrs_update": lambda df: df.attrs.update(versao=2),
+    "coluna_iloc": lambda df: df["symptom_count"].iloc.__setitem__(0, 0),
+    "coluna_setitem": lambda df: df["symptom_count"].__setitem__(0, 0),
+    "coluna_como_atributo_iloc": lambda df: df.symptom_count.iloc.__setitem__(0, 0),
+    "coluna_fillna_inplace": lambda df: df["symptom_count"].fillna(0, inplace=True),
+    "coluna_name": lambda df: setattr(df["symptom_count"], "name", "sintomas"),
+}
+
+
+@pytest.mark.parametrize("mutation", MUTATIONS.values(), ids=MUTATIONS.keys())
+def test_frozen_frame_rejects_mutation(frozen, mutation):
+    with pytest.raises(ReadOnlyFrameError):
+        mutation(frozen)
+    assert list(frozen.columns) == ["gender", "symptom_count"]
+    assert list(frozen.index) == [0, 1]
+    assert frozen["symptom_count"].tolist() == [1, 2]
+    assert frozen.index.name is None and frozen.columns.name is None
+    assert frozen.attrs == {}
+
+
+def test_frozen_frame_allows_copies(frozen):
+    renamed = frozen.set_axis(["a", "b"], axis=1)
+    assigned = frozen.assign(symptom_count=0)
+    assert list(renamed.columns) == ["a", "b"]
+    assert assigned["symptom_count"].tolist() == [0, 0]
+    assert type(assigned) is pd.DataFrame
+    assert frozen["symptom_count"].tolist() == [1, 2]
+
+    column = frozen["symptom_count"].copy()
+    column.iloc[0] = 5
+    named = frozen.rename_axis("linha")
+    named.attrs["versao"] = 2
+    assert column.tolist() == [5, 2]
+    assert named.index.name == "linha" and named.attrs == {"versao": 2}
+    assert frozen.index.name is None and frozen.attrs == {}